@@ -10,13 +10,22 @@ import time
 import hashlib
 import traceback
 import re
+import gzip
+import shutil
+import sqlite3
+import select
+import struct
+import ctypes
+import ctypes.util
+from functools import lru_cache
+from collections import OrderedDict, deque
 from typing import Optional
 from datetime import datetime
 
 import pexpect
 import requests
 from bs4 import BeautifulSoup
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, session, send_from_directory
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, flash, session, send_from_directory
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev")
@@ -28,8 +37,10 @@ os.makedirs(DATA_DIR, exist_ok=True)
 GOGREPO = os.environ.get("GOGREPO_PATH", os.path.join(APP_DIR, "gogrepo.py"))
 PY      = os.environ.get("PYTHON_BIN", "python3")
 
-MANIFEST = os.path.join(DATA_DIR, "gog-manifest.dat")
+MANIFEST = os.path.join(DATA_DIR, "gog-manifest.db")
+LEGACY_MANIFEST = os.path.join(DATA_DIR, "gog-manifest.dat")
 COOKIES  = os.path.join(DATA_DIR, "gog-cookies.dat")
+BANDWIDTH = os.path.join(DATA_DIR, "gog-bandwidth.json")  # read by running gogrepo downloads
 
 # Download directory for checking downloaded games
 DOWNLOAD_DIR = os.environ.get("GOGREPO_DOWNLOAD_DIR", DATA_DIR)
@@ -40,6 +51,9 @@ COVER_DIR = os.path.join(CACHE_DIR, "cover")
 os.makedirs(DESC_DIR, exist_ok=True)
 os.makedirs(COVER_DIR, exist_ok=True)
 
+JOBS_DIR = os.path.join(DATA_DIR, "jobs")
+os.makedirs(JOBS_DIR, exist_ok=True)
+
 DAY_MS    = 24 * 60 * 60 * 1000
 DESC_TTL  = 7 * DAY_MS
 COVER_TTL = 30 * DAY_MS
@@ -189,6 +203,7 @@ def _format_date(date_str: str) -> str:
         pass
     return date_str
 
+@lru_cache(maxsize=8192)
 def normalize_game_folder_name(title: str) -> str:
     """
     Convert game title to expected folder name format
@@ -206,9 +221,132 @@ def normalize_game_folder_name(title: str) -> str:
     normalized = normalized.strip('_')
     return normalized
 
+DOWNLOAD_INDEX_POLL   = int(os.environ.get("GOGREPO_DOWNLOAD_INDEX_POLL", "30"))  # seconds between checks without inotify
+DOWNLOAD_INDEX_RESCAN = 600  # full rescan even with inotify, which misses changes made by other NFS/SMB clients
+
+# inotify(7) constants
+_IN_MOVED_FROM, _IN_MOVED_TO, _IN_CREATE, _IN_DELETE = 0x40, 0x80, 0x100, 0x200
+_IN_DELETE_SELF, _IN_MOVE_SELF, _IN_Q_OVERFLOW, _IN_IGNORED = 0x400, 0x800, 0x4000, 0x8000
+_IN_ONLYDIR, _IN_ISDIR, _IN_CLOEXEC = 0x01000000, 0x40000000, 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+def _inotify_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError, TypeError):
+        return None
+
+class DownloadIndex:
+    """Set of the folder names in a download dir, so is_game_downloaded is answered from
+    memory. It is built with one os.scandir pass and kept current by a background thread,
+    through inotify where the platform has it, else by re-scanning whenever the mtime of
+    the directory changes.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.dirs: set[str] = set()
+        self.mode: Optional[str] = None  # "inotify" or "poll" once started
+        self.thread: Optional[threading.Thread] = None
+        self.scanned_mtime = None
+
+    def ensure_started(self):
+        if self.thread is not None:
+            return
+        with self.start_lock:
+            if self.thread is not None:
+                return
+            self.rescan()  # before publishing the thread, so no caller answers from an empty set
+            thread = threading.Thread(target=self._run, name="download-index", daemon=True)
+            thread.start()
+            self.thread = thread
+
+    def has(self, name: str) -> bool:
+        self.ensure_started()
+        with self.lock:
+            return name in self.dirs
+
+    def rescan(self):
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+            with os.scandir(self.root) as it:
+                dirs = {e.name for e in it if e.is_dir()}
+        except OSError:
+            mtime, dirs = None, set()
+        with self.lock:
+            self.dirs = dirs
+            self.scanned_mtime = mtime
+
+    def _run(self):
+        libc = _inotify_libc()
+        while True:
+            if not (libc and self._watch(libc)):
+                self._poll_once()
+                time.sleep(DOWNLOAD_INDEX_POLL)
+
+    def _poll_once(self):
+        self.mode = "poll"
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime is None or mtime != self.scanned_mtime:
+            self.rescan()
+
+    def _watch(self, libc) -> bool:
+        """Follows the download dir through inotify until the watch goes away. Returns
+        False if inotify cannot be used, so the caller polls instead."""
+        fd = libc.inotify_init1(_IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            mask = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+            if libc.inotify_add_watch(fd, os.fsencode(self.root), mask) < 0:
+                return False
+            self.mode = "inotify"
+            self.rescan()  # pick up anything that changed before the watch was in place
+            last_scan = time.monotonic()
+            while True:
+                ready, _, _ = select.select([fd], [], [], DOWNLOAD_INDEX_RESCAN)
+                if not ready or time.monotonic() - last_scan > DOWNLOAD_INDEX_RESCAN:
+                    self.rescan()
+                    last_scan = time.monotonic()
+                    if not ready:
+                        continue
+                buf = os.read(fd, 64 * 1024)
+                pos = 0
+                while pos + _INOTIFY_EVENT.size <= len(buf):
+                    _, ev_mask, _, name_len = _INOTIFY_EVENT.unpack_from(buf, pos)
+                    name = os.fsdecode(buf[pos + _INOTIFY_EVENT.size:pos + _INOTIFY_EVENT.size + name_len].rstrip(b"\0"))
+                    pos += _INOTIFY_EVENT.size + name_len
+                    if ev_mask & (_IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED):
+                        return True  # the dir itself is gone, set up a new watch
+                    if ev_mask & _IN_Q_OVERFLOW:
+                        self.rescan()
+                        continue
+                    if not name:
+                        continue
+                    if ev_mask & (_IN_CREATE | _IN_MOVED_TO):
+                        # stat instead of trusting IN_ISDIR, which is not set for a symlink to a dir
+                        if ev_mask & _IN_ISDIR or os.path.isdir(os.path.join(self.root, name)):
+                            with self.lock:
+                                self.dirs.add(name)
+                    else:
+                        with self.lock:
+                            self.dirs.discard(name)
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+
+download_index = DownloadIndex(DOWNLOAD_DIR)
+
 def is_game_downloaded(title: str) -> bool:
     """
-    Check if game folder exists in download directory
+    Check if game folder exists in download directory, answered from download_index
     """
     if not title:
         return False
@@ -217,9 +355,7 @@ def is_game_downloaded(title: str) -> bool:
     if not folder_name:
         return False
     
-    game_path = os.path.join(DOWNLOAD_DIR, folder_name)
-    
-    return os.path.isdir(game_path)
+    return download_index.has(folder_name)
 
 def _scrape_gog_page(title: str) -> Optional[dict]:
     """Scrape game details from GOG product page"""
@@ -350,11 +486,13 @@ def fetch_game_info_combined(product_id: str, title: str) -> dict:
     
     if title:
         manifest_data = _find_game_raw_by_title(title)
-        if manifest_data:
-            full_title = (manifest_data.get("long_title") or 
-                         manifest_data.get("game_title") or 
-                         manifest_data.get("name") or 
-                         title)
+    if not manifest_data and product_id:
+        manifest_data = manifest_cache.get_by_id(product_id)
+    if manifest_data:
+        full_title = (manifest_data.get("long_title") or 
+                      manifest_data.get("game_title") or 
+                      manifest_data.get("name") or 
+                      title)
     
     # Fallback: if still has underscores, replace them
     if '_' in full_title:
@@ -538,61 +676,565 @@ def fetch_game_info_combined(product_id: str, title: str) -> dict:
     
     return info
 
+JOB_PROGRESS_MAX_ERRORS = 20
+JOB_LOG_CHUNK      = 64 * 1024    # output is kept in chunks of about this many bytes
+JOB_LOG_MEM_LIMIT  = 1024 * 1024  # bytes of output kept in memory per job, older chunks spill to disk
+JOB_LOG_READ_LIMIT = 512 * 1024   # max bytes of output returned by one poll
+JOB_STREAM_MAX_SUBSCRIBERS = 8    # concurrent event stream clients per job
+JOB_STREAM_KEEPALIVE = 15         # seconds between keepalive comments on an idle stream
+JOB_KEEP_FINISHED  = 5                  # finished jobs kept in memory, older ones are served from disk
+JOB_HISTORY_MAX_COUNT = 200             # archived jobs kept on disk
+JOB_HISTORY_MAX_AGE   = 30 * 24 * 3600  # seconds
+JOB_HISTORY_MAX_BYTES = 64 * 1024 * 1024  # total size of archived metadata and compressed logs
+
+def _trim_to_line(data: bytes) -> bytes:
+    nl = data.find(b"\n")
+    return data[nl + 1:] if nl != -1 else data
+
+class JobLog:
+    """Append-only job output. The newest bytes are kept in memory as a bounded ring of
+    chunks; chunks pushed out of the ring are spilled to a file on disk. Positions are
+    byte offsets into the whole output, so readers can poll for what is new since their
+    last offset.
+    """
+    def __init__(self, spill_path: str):
+        self.spill_path = spill_path
+        self.spill_gz = False
+        self.chunks = deque()
+        self.tail = bytearray()
+        self.mem_start = 0  # offset of the first byte still in memory
+        self.mem_size = 0
+        self.end = 0
+
+    def append(self, text: str):
+        data = text.encode("utf-8")
+        self.tail += data
+        self.end += len(data)
+        self.mem_size += len(data)
+        if len(self.tail) >= JOB_LOG_CHUNK:
+            self.chunks.append(bytes(self.tail))
+            self.tail = bytearray()
+        if self.mem_size > JOB_LOG_MEM_LIMIT and self.chunks:
+            with open(self.spill_path, "ab") as f:
+                while self.mem_size > JOB_LOG_MEM_LIMIT and self.chunks:
+                    chunk = self.chunks.popleft()
+                    f.write(chunk)
+                    self.mem_start += len(chunk)
+                    self.mem_size -= len(chunk)
+
+    def read(self, since: int = 0, limit: int = JOB_LOG_READ_LIMIT) -> tuple[str, int, bool]:
+        """Returns (text, new offset, skipped). If more than limit bytes are pending, only
+        the newest ones are returned, starting at a line boundary, and skipped is True.
+        """
+        end = self.end
+        since = max(0, min(since, end))
+        skipped = end - since > limit
+        if skipped:
+            since = end - limit
+        parts = []
+        if since < self.mem_start:
+            try:
+                with (gzip.open if self.spill_gz else open)(self.spill_path, "rb") as f:
+                    f.seek(since)
+                    parts.append(f.read(self.mem_start - since))
+            except (OSError, EOFError):
+                pass
+        pos = self.mem_start
+        for chunk in list(self.chunks) + [bytes(self.tail)]:
+            if pos + len(chunk) > since:
+                parts.append(chunk[max(0, since - pos):])
+            pos += len(chunk)
+        data = b"".join(parts)
+        if skipped:
+            data = _trim_to_line(data)
+        return data.decode("utf-8", errors="replace"), end, skipped
+
+    def archive(self, gz_path: str):
+        """Writes the whole output, spilled and in memory, to a gzip file and removes the
+        spill file. Later reads of spilled output go to the gzip file.
+        """
+        tmp = gz_path + ".tmp"
+        with gzip.open(tmp, "wb") as out:
+            if self.mem_start:
+                with open(self.spill_path, "rb") as f:
+                    shutil.copyfileobj(f, out)
+            for chunk in self.chunks:
+                out.write(chunk)
+            out.write(self.tail)
+        os.replace(tmp, gz_path)
+        if self.mem_start:
+            os.remove(self.spill_path)
+        self.spill_path, self.spill_gz = gz_path, True
+
 class Job:
-    def __init__(self):
-        self.status = "running"
-        self.output = ""
+    def __init__(self, job_id: str, args: Optional[list] = None, cwd: Optional[str] = None, events: bool = False,
+                 priority: int = 5, locks=(), network: bool = True):
+        self.id = job_id
+        self.args = list(args or [])
+        self.cwd = cwd
+        self.events = events      # ask gogrepo for json progress events
+        self.priority = priority  # lower runs first, see JobScheduler
+        self.locks = tuple(locks)
+        self.network = network
+        self.queued = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.status = "queued"
+        self.log = JobLog(os.path.join(JOBS_DIR, f"{job_id}.log"))
         self.rc: Optional[int] = None
         self.lock = threading.Lock()
         self.proc: Optional[subprocess.Popen] = None
+        self.cancel_requested = False  # set under the scheduler lock, checked before the process starts
+        self.progress: Optional[dict] = None
+        self.progress_version = 0
+        self.changed = threading.Condition(self.lock)
+        self.subscribers = 0
 
     def append(self, text: str):
         with self.lock:
-            self.output += text
+            self.log.append(text)
+            self.changed.notify_all()
+
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def snapshot(self, since: int = 0) -> dict:
+        with self.lock:
+            output, offset, skipped = self.log.read(since)
+            return {"status": self.status, "output": output, "offset": offset, "skipped": skipped,
+                    "rc": self.rc, "progress": self.progress}
+
+    def apply_event(self, event: dict):
+        """Folds one gogrepo json progress event into the compact progress state"""
+        with self.lock:
+            p = self.progress or {"total": 0, "done": 0, "remaining": 0, "percent": 0.0, "rate": 0, "eta": None,
+                                  "queue": 0, "files": [], "files_done": 0, "error_count": 0, "errors": []}
+            kind = event.get("event")
+            if kind in ("start", "progress", "finish"):
+                p["total"] = event.get("total", p["total"])
+                p["remaining"] = event.get("remaining", p["remaining"])
+                p["done"] = p["total"] - p["remaining"]
+                p["percent"] = round(100.0 * p["done"] / p["total"], 1) if p["total"] else 0.0
+            if kind == "progress":
+                p["files"] = event.get("files", [])
+                p["rate"] = event.get("rate", 0)
+                p["eta"] = event.get("eta")
+                p["queue"] = event.get("queue", 0)
+            elif kind == "finish":
+                p["files"], p["rate"], p["eta"], p["queue"] = [], 0, None, 0
+            elif kind == "file_done":
+                p["files_done"] += 1
+            elif kind == "error":
+                p["error_count"] += 1
+                p["errors"] = (p["errors"] + [{"file": event.get("file"), "message": event.get("message")}])[-JOB_PROGRESS_MAX_ERRORS:]
+            self.progress = p
+            self.progress_version += 1
+            self.changed.notify_all()
 
     def finish(self, rc: int, status: Optional[str] = None):
         with self.lock:
             self.rc = rc
             self.status = status if status else ("finished" if rc == 0 else "error")
+            self.finished = time.time()
+            self.changed.notify_all()
+
+    def meta(self) -> dict:
+        return {"id": self.id, "args": self.args, "status": self.status, "rc": self.rc, "priority": self.priority,
+                "queued": self.queued, "started": self.started, "finished": self.finished, "size": self.log.end}
+
+    def subscribe(self):
+        """Reserves one of the JOB_STREAM_MAX_SUBSCRIBERS stream slots. Returns a function
+        releasing it, which is safe to call more than once, or None if all are taken."""
+        released = []
+        def release():
+            with self.lock:
+                if not released:
+                    released.append(True)
+                    self.subscribers -= 1
+        with self.lock:
+            if self.subscribers >= JOB_STREAM_MAX_SUBSCRIBERS:
+                return None
+            self.subscribers += 1
+        return release
+
+    def stream(self, since: int = 0, release=None):
+        """Yields server-sent events with new output and progress until the job ends.
+        Each event carries at most JOB_LOG_READ_LIMIT bytes read from the shared log, so
+        a slow client skips ahead instead of buffering output per subscriber. release,
+        from subscribe(), is called when the stream ends.
+        """
+        offset, progress_seen, status_seen = since, -1, None
+        try:
+            while True:
+                with self.changed:
+                    changed = lambda: (self.log.end > offset or self.progress_version != progress_seen
+                                       or self.status != status_seen)
+                    if not self.changed.wait_for(changed, timeout=JOB_STREAM_KEEPALIVE):
+                        data = None
+                    else:
+                        output, offset, skipped = self.log.read(offset)
+                        data = {"status": self.status, "output": output, "offset": offset, "skipped": skipped, "rc": self.rc}
+                        status_seen = self.status
+                        if self.progress_version != progress_seen:
+                            data["progress"] = self.progress
+                            progress_seen = self.progress_version
+                if data is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: update\ndata: {json.dumps(data)}\n\n"
+                if data["status"] not in ("queued", "running") and offset == self.log.end:
+                    return
+        finally:
+            if release is not None:
+                release()
+
+
+class JobStore:
+    """Registry of jobs. Running jobs and the last JOB_KEEP_FINISHED finished ones are kept
+    in memory. Every job also has <id>.json metadata under JOBS_DIR; once it finishes its
+    output is compressed to <id>.log.gz and the archive is pruned by count, age and size.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self.active: "OrderedDict[str, Job]" = OrderedDict()
+        self.history: dict[str, dict] = {}
+        self._recover()
 
-jobs = {}
+    def _path(self, job_id: str, ext: str) -> str:
+        return os.path.join(self.root, job_id + ext)
+
+    def _write_meta(self, meta: dict):
+        path = self._path(meta["id"], ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def _recover(self):
+        """Loads archived metadata. Jobs that were still running when the service stopped
+        are marked interrupted and whatever output reached the spill file is archived."""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                job_id = meta["id"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if meta.get("status") in ("queued", "running"):
+                meta["status"], meta["size"] = "interrupted", 0
+                meta["finished"] = meta.get("started") or meta.get("queued")
+                spill, gz_path = self._path(job_id, ".log"), self._path(job_id, ".log.gz")
+                try:
+                    with open(spill, "rb") as f, gzip.open(gz_path, "wb") as out:
+                        shutil.copyfileobj(f, out)
+                        meta["size"] = f.tell()
+                    os.remove(spill)
+                except OSError:
+                    pass
+                try:
+                    self._write_meta(meta)
+                except OSError:
+                    continue
+            self.history[job_id] = meta
+        # spill files of jobs without metadata, or left behind by a failed archive
+        for name in names:
+            if name.endswith(".tmp") or (name.endswith(".log") and name[:-4] not in self.history):
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+        self._prune()
+
+    def add(self, job: Job):
+        try:
+            self._write_meta(job.meta())
+        except OSError:
+            pass
+        with self.lock:
+            self.active[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.active.get(job_id)
+
+    def running(self) -> list:
+        with self.lock:
+            return [j for j in self.active.values() if j.status == "running"]
+
+    def pending(self) -> list:
+        with self.lock:
+            return [j for j in self.active.values() if j.active()]
+
+    def archive(self, job: Job):
+        """Persists a finished job and drops the oldest finished jobs from memory"""
+        with job.lock:
+            meta = job.meta()
+            try:
+                job.log.archive(self._path(job.id, ".log.gz"))
+                self._write_meta(meta)
+            except OSError:
+                app.logger.exception(f"Failed to archive job {job.id}")
+        with self.lock:
+            self.history[job.id] = meta
+            self.active.move_to_end(job.id)
+            finished = [k for k, j in self.active.items() if not j.active()]
+            for k in finished[:-JOB_KEEP_FINISHED]:
+                del self.active[k]
+            self._prune()
+
+    def _prune(self):
+        now, total = time.time(), 0
+        ordered = sorted(self.history.values(), key=lambda m: m.get("finished") or 0, reverse=True)
+        for n, meta in enumerate(ordered):
+            job_id = meta["id"]
+            paths = [self._path(job_id, ".json"), self._path(job_id, ".log.gz")]
+            try:
+                total += sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+            except OSError:
+                pass
+            if (n < JOB_HISTORY_MAX_COUNT and total <= JOB_HISTORY_MAX_BYTES
+                    and now - (meta.get("finished") or 0) <= JOB_HISTORY_MAX_AGE) or job_id in self.active:
+                continue
+            del self.history[job_id]
+            for p in paths:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    def snapshot(self, job_id: str, since: int = 0) -> Optional[dict]:
+        job = self.get(job_id)
+        if job:
+            return job.snapshot(since)
+        with self.lock:
+            meta = self.history.get(job_id)
+        if not meta:
+            return None
+        end = meta.get("size") or 0
+        since = max(0, min(since, end))
+        skipped = end - since > JOB_LOG_READ_LIMIT
+        if skipped:
+            since = end - JOB_LOG_READ_LIMIT
+        data = b""
+        if end > since:
+            try:
+                with gzip.open(self._path(job_id, ".log.gz"), "rb") as f:
+                    f.seek(since)
+                    data = f.read(end - since)
+            except (OSError, EOFError):
+                pass
+        if skipped:
+            data = _trim_to_line(data)
+        return {"status": meta.get("status"), "output": data.decode("utf-8", errors="replace"), "offset": end,
+                "skipped": skipped, "rc": meta.get("rc"), "progress": None}
+
+    def open_log(self, job_id: str):
+        """Returns a binary file object with the complete output of a job, or None"""
+        job = self.get(job_id)
+        if job and job.active():
+            return None
+        try:
+            return gzip.open(self._path(job_id, ".log.gz"), "rb")
+        except OSError:
+            return None
+
+    def list(self, limit: int = 50) -> list:
+        with self.lock:
+            metas = {k: j.meta() for k, j in self.active.items()}
+            for k, m in self.history.items():
+                metas.setdefault(k, m)
+        return sorted(metas.values(), key=lambda m: m.get("started") or m.get("queued") or 0, reverse=True)[:limit]
+
+
+job_store = JobStore(JOBS_DIR)
 _current_job_id = None
 _current_job_lock = threading.Lock()
 
-def _run_stream(job_id, args, cwd=None):
+def _read_progress_events(job: Job, fd: int):
+    with open(fd, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                job.apply_event(json.loads(line))
+            except ValueError:
+                continue
+
+def _run_stream(job_id, args, cwd=None, progress=False):
     global _current_job_id
-    job = jobs[job_id]
+    job = job_store.get(job_id)
+    pass_fds, events_r, events_w, reader = (), None, None, None
+    with _current_job_lock:
+        _current_job_id = job_id
     try:
         job.append("$ " + " ".join(shlex.quote(a) for a in args) + "\n")
         env = os.environ.copy()
         env["PYTHONUNBUFFERED"] = "1"
-        proc = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, env=env)
-        job.proc = proc
+        if progress:
+            # gogrepo writes json progress events to this pipe, next to its human readable log
+            events_r, events_w = os.pipe()
+            env["GOGREPO_PROGRESS_FD"] = str(events_w)
+            pass_fds = (events_w,)
+        try:
+            with scheduler.lock:
+                if job.cancel_requested:
+                    proc = None
+                else:
+                    proc = job.proc = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                       text=True, bufsize=1, env=env, pass_fds=pass_fds)
+        finally:
+            if events_w is not None:
+                os.close(events_w)
+        if proc is None:
+            if events_r is not None:
+                os.close(events_r)
+                events_r = None
+            job.append("[INFO] Canceled before the process started\n")
+            job.finish(-9, status="canceled")
+            return
+        if events_r is not None:
+            reader = threading.Thread(target=_read_progress_events, args=(job, events_r), daemon=True)
+            reader.start()
+            events_r = None
         for line in proc.stdout:
             job.append(line)
         rc = proc.wait()
+        if reader is not None:
+            reader.join(timeout=5)
         if job.status == "running":
             job.finish(rc)
     except Exception as e:
+        if events_r is not None:
+            os.close(events_r)
         job.append(f"\n[ERROR] {e}\n{traceback.format_exc()}\n")
         job.finish(1)
     finally:
         with _current_job_lock:
             if _current_job_id == job_id:
                 _current_job_id = None
+        job_store.archive(job)
+        scheduler.done(job)
 
-def start_job(args, cwd=None) -> str:
-    global _current_job_id
-    job_id = str(uuid.uuid4())
-    jobs[job_id] = Job()
-    with _current_job_lock:
-        _current_job_id = job_id
-    t = threading.Thread(target=_run_stream, args=(job_id, args, cwd), daemon=True)
-    t.start()
-    return job_id
+JOB_MAX_NETWORK = max(1, int(os.environ.get("GOGREPO_MAX_NETWORK_JOBS", "2")))
+PRIORITY_INTERACTIVE = 0   # single game downloads started from the UI
+PRIORITY_NORMAL      = 5
+PRIORITY_BULK        = 10  # download all
+
+class JobScheduler:
+    """Runs queued jobs in priority order, lower first and FIFO within a priority. A job
+    starts when starting it keeps the number of network jobs within max_network and none
+    of its locks conflicts with those of a running job. Locks are (name, mode) pairs, mode
+    "r" is shared and "w" exclusive, e.g. update takes ("manifest", "w") and downloads take
+    ("manifest", "r"). The queue is dispatched strictly in order, a blocked job holds back
+    the ones behind it so it cannot be starved. Only a job that does not use the network
+    (verify) may pass queued jobs, and only those its locks do not conflict with, as it
+    takes nothing they are waiting for.
+    """
+    def __init__(self, max_network: int):
+        self.max_network = max_network
+        self.lock = threading.Lock()
+        self.queue: list[Job] = []
+        self.running: list[Job] = []
+
+    @staticmethod
+    def _conflicts(a: Job, b: Job) -> bool:
+        return any(na == nb and "w" in (ma, mb) for na, ma in a.locks for nb, mb in b.locks)
+
+    def _blocker(self, job: Job) -> Optional[str]:
+        if job.network and sum(1 for r in self.running if r.network) >= self.max_network:
+            return f"{self.max_network} network job(s) running"
+        for r in self.running:
+            if self._conflicts(job, r):
+                return f"job {r.id[:8]} holds {', '.join(n for n, _ in r.locks)}"
+        return None
+
+    def _dispatch(self):
+        i = 0
+        while i < len(self.queue):
+            job = self.queue[i]
+            ahead = self.queue[:i]
+            if self._blocker(job) is not None or ahead and (job.network or any(self._conflicts(job, q) for q in ahead)):
+                i += 1
+                continue
+            self.queue.pop(i)
+            self.running.append(job)
+            with job.lock:
+                job.status, job.started = "running", time.time()
+                job.changed.notify_all()
+            threading.Thread(target=_run_stream, args=(job.id, job.args, job.cwd, job.events), daemon=True).start()
+
+    def submit(self, job: Job) -> Job:
+        """Queues a job. If an identical job is already queued or running, that one is
+        returned instead."""
+        with self.lock:
+            for other in self.running + self.queue:
+                if other.args == job.args and other.cwd == job.cwd:
+                    return other
+            job_store.add(job)
+            pos = next((i for i, q in enumerate(self.queue) if q.priority > job.priority), len(self.queue))
+            self.queue.insert(pos, job)
+            self._dispatch()
+            if job in self.queue:
+                pos = self.queue.index(job)
+                reason = self._blocker(self.queue[0]) or "jobs ahead"
+                job.append(f"[QUEUED] Position {pos + 1} in queue, waiting: {reason}\n")
+        return job
+
+    def done(self, job: Job):
+        with self.lock:
+            if job in self.running:
+                self.running.remove(job)
+            self._dispatch()
+
+    def cancel_queued(self, job: Job) -> bool:
+        with self.lock:
+            if job not in self.queue:
+                return False
+            self.queue.remove(job)
+            job.append("[INFO] Removed from queue\n")
+            job.finish(-9, status="canceled")
+            self._dispatch()
+        job_store.archive(job)
+        return True
+
+    def move(self, job_id: str, position: int) -> bool:
+        with self.lock:
+            job = next((q for q in self.queue if q.id == job_id), None)
+            if job is None:
+                return False
+            self.queue.remove(job)
+            self.queue.insert(max(0, min(position, len(self.queue))), job)
+            self._dispatch()
+        return True
+
+    def state(self) -> dict:
+        with self.lock:
+            running = [{**j.meta(), "locks": j.locks} for j in self.running]
+            queued = [{**j.meta(), "locks": j.locks, "position": i} for i, j in enumerate(self.queue)]
+            blocker = self._blocker(self.queue[0]) if self.queue else None
+        return {"max_network": self.max_network, "running": running, "queued": queued, "blocked_by": blocker}
+
+scheduler = JobScheduler(JOB_MAX_NETWORK)
+
+def start_job(args, cwd=None, progress=False, priority=PRIORITY_NORMAL, locks=(), network=True) -> str:
+    job = scheduler.submit(Job(str(uuid.uuid4()), args, cwd, progress, priority, locks, network))
+    return job.id
 
 def cancel_job(job_id: Optional[str]) -> tuple[bool, str]:
-    job = jobs.get(job_id or "")
+    job = job_store.get(job_id or "")
+    if job and scheduler.cancel_queued(job):
+        return True, "Removed from queue"
+    if job:
+        with scheduler.lock:
+            if job.status == "running" and job.proc is None:
+                # dispatched, but its process is not started yet: the launcher sees this and skips it
+                job.cancel_requested = True
+                job.append("\n[INFO] Cancel requested before start\n")
+                return True, "Canceled"
     if not job or job.status != "running" or not job.proc:
         return False, "No running job"
     try:
@@ -610,20 +1252,23 @@ def cancel_job(job_id: Optional[str]) -> tuple[bool, str]:
         job.append(f"[ERROR] Cancel failed: {e}\n")
         return False, str(e)
 
-def _extract_games_from_obj(data):
+def _manifest_items(data) -> list:
     if isinstance(data, dict):
         if isinstance(data.get("products"), dict):
-            source = list(data["products"].values())
-        elif "games" in data:
-            source = list(data["games"].values()) if isinstance(data["games"], dict) else data["games"]
-        else:
-            source = [v for v in data.values() if isinstance(v, dict)]
-    elif isinstance(data, list):
-        source = data
-    else:
-        source = []
+            return list(data["products"].values())
+        if "games" in data:
+            return list(data["games"].values()) if isinstance(data["games"], dict) else data["games"]
+        return [v for v in data.values() if isinstance(v, dict)]
+    if isinstance(data, list):
+        return data
+    return []
+
+def _game_product_id(g: dict):
+    return g.get("product_id") or g.get("productId") or g.get("productid") or g.get("id")
+
+def _extract_games_from_obj(data):
     out, seen = [], set()
-    for g in source:
+    for g in _manifest_items(data):
         if not isinstance(g, dict):
             continue
         slug = (g.get("title") or g.get("slug") or "").strip()
@@ -633,33 +1278,217 @@ def _extract_games_from_obj(data):
         if '_' in nice and nice == slug:
             nice = nice.replace('_', ' ').title()
         
-        pid  = g.get("product_id") or g.get("productId") or g.get("productid") or g.get("id")
+        pid  = _game_product_id(g)
         if slug and slug.lower() not in seen:
             seen.add(slug.lower())
             out.append({"title": slug, "long_title": nice, "product_id": pid})
     out.sort(key=lambda x: x["long_title"].lower())
     return out
 
-def _load_manifest_raw():
+def _load_manifest_db():
+    conn = sqlite3.connect(f"file:{MANIFEST}?mode=ro", uri=True, timeout=30)
     try:
-        with open(MANIFEST, "rb") as f:
+        rows = conn.execute("SELECT data FROM games ORDER BY pos").fetchall()
+    finally:
+        conn.close()
+    return [json.loads(data) for (data,) in rows]
+
+def _load_manifest_legacy():
+    try:
+        with open(LEGACY_MANIFEST, "rb") as f:
             return pickle.load(f)
     except Exception:
         pass
     try:
-        with open(MANIFEST, "r", encoding="utf-8") as f:
+        with open(LEGACY_MANIFEST, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         pass
     try:
-        with open(MANIFEST, "r", encoding="utf-8", errors="ignore") as f:
+        with open(LEGACY_MANIFEST, "r", encoding="utf-8", errors="ignore") as f:
             return ast.literal_eval(f.read())
     except Exception:
         return None
 
+def _load_manifest_raw():
+    if os.path.exists(MANIFEST):
+        try:
+            return _load_manifest_db()
+        except Exception:
+            app.logger.exception("Failed to read manifest database")
+            return None
+    return _load_manifest_legacy()
+
+class ManifestCache:
+    """Keeps one parsed copy of the manifest in memory, reloaded only when the
+    file's (mtime, size, inode) changes, with dict indexes by slug and product id.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.games = []
+        self.by_slug = {}
+        self.by_id = {}
+
+    @staticmethod
+    def _stat_key():
+        for path in (MANIFEST, LEGACY_MANIFEST):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        return None
+
+    def _refresh(self):
+        key = self._stat_key()
+        if key == self.key:
+            return
+        raw = _load_manifest_raw() if key else None
+        if key and raw is None:
+            return  # unreadable, e.g. mid-write: keep serving the last good copy and retry next time
+        by_slug, by_id = {}, {}
+        for g in _manifest_items(raw):
+            if not isinstance(g, dict):
+                continue
+            slug = (g.get("title") or "").strip()
+            if slug:
+                by_slug.setdefault(slug, g)
+            pid = _game_product_id(g)
+            if pid is not None:
+                by_id.setdefault(str(pid), g)
+        self.games = _extract_games_from_obj(raw) if raw is not None else []
+        self.by_slug, self.by_id = by_slug, by_id
+        self.key = key
+
+    def get_games(self) -> list:
+        with self.lock:
+            self._refresh()
+            return self.games
+
+    def get_by_slug(self, slug: str):
+        with self.lock:
+            self._refresh()
+            return self.by_slug.get(slug)
+
+    def get_by_id(self, product_id):
+        with self.lock:
+            self._refresh()
+            return self.by_id.get(str(product_id))
+
+    def get_raw_games(self) -> dict:
+        with self.lock:
+            self._refresh()
+            return self.by_slug
+
+manifest_cache = ManifestCache()
+
+COMPLETENESS_MAX_AGE = 600  # recheck a game dir after this many seconds even if its mtime is unchanged
+PARTIAL_MARKER_EXT = ".partial"  # same as gogrepo.PARTIAL_MARKER_EXT
+
+def _manifest_files(g: dict) -> list:
+    """(kind, name, size) for every downloads/extras entry of a raw manifest game"""
+    out = []
+    for kind in ("downloads", "extras"):
+        for item in g.get(kind) or []:
+            if isinstance(item, dict) and item.get("name"):
+                out.append((kind, item["name"], item.get("size")))
+    return out
+
+def _game_completeness(slug: str, files: list, path: Optional[str]) -> dict:
+    on_disk = {}
+    try:
+        if path is not None:
+            with os.scandir(path) as it:
+                for e in it:
+                    if e.is_file():
+                        on_disk[e.name] = e.stat().st_size
+    except OSError:
+        pass
+    present = total = count = 0
+    missing = []
+    for kind, name, size in files:
+        total += size or 0
+        have = on_disk.get(name)
+        if have is None:
+            reason = "missing"
+        elif name + PARTIAL_MARKER_EXT in on_disk:
+            reason = "partial"
+        elif size is not None and have != size:
+            reason = "size"
+        else:
+            present += have
+            count += 1
+            continue
+        missing.append({"name": name, "kind": kind, "size": size, "on_disk": have, "reason": reason})
+    return {
+        "title": slug,
+        "complete": not missing,
+        "bytes_present": present,
+        "bytes_total": total,
+        "files_present": count,
+        "files_total": len(files),
+        "missing": missing,
+    }
+
+class CompletenessIndex:
+    """Per-game comparison of the manifest's downloads/extras against the files in the
+    download dir. A game's result is reused until its manifest entries or the mtime of
+    its folder change, which covers files being added, removed or renamed and the
+    .partial marker of an unfinished download coming and going, or until a file flagged
+    with the wrong size or as partial is rewritten in place, which the folder mtime
+    does not show, so those files are stat'ed on every request.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        self.cache: dict[str, tuple] = {}  # slug -> (key, checked, result, flagged file stats)
+
+    @staticmethod
+    def _flagged_stats(path: Optional[str], result: dict) -> tuple:
+        out = []
+        for m in result["missing"]:
+            if path is None or m["reason"] == "missing":
+                continue
+            try:
+                st = os.stat(os.path.join(path, m["name"]))
+                out.append((st.st_size, st.st_mtime_ns))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def get(self, slug: str, g: dict) -> dict:
+        files = _manifest_files(g)
+        path = os.path.join(self.root, slug)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        key = (tuple(files), mtime)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.cache.get(slug)
+        path = path if mtime is not None else None
+        if (cached and cached[0] == key and now - cached[1] < COMPLETENESS_MAX_AGE
+                and self._flagged_stats(path, cached[2]) == cached[3]):
+            return cached[2]
+        result = _game_completeness(slug, files, path)
+        with self.lock:
+            self.cache[slug] = (key, now, result, self._flagged_stats(path, result))
+        return result
+
+    def all(self) -> list:
+        games = manifest_cache.get_raw_games()
+        out = [self.get(slug, g) for slug, g in games.items()]
+        with self.lock:
+            for slug in set(self.cache) - set(games):
+                del self.cache[slug]
+        return out
+
+completeness_index = CompletenessIndex(DOWNLOAD_DIR)
+
 def load_manifest_games():
-    raw = _load_manifest_raw()
-    games = _extract_games_from_obj(raw) if raw is not None else []
+    games = [dict(g) for g in manifest_cache.get_games()]
     
     # Add download status to each game
     for game in games:
@@ -668,24 +1497,7 @@ def load_manifest_games():
     return games
 
 def _find_game_raw_by_title(slug: str):
-    data = _load_manifest_raw()
-    if data is None:
-        return None
-    if isinstance(data, dict):
-        if isinstance(data.get("products"), dict):
-            items = list(data["products"].values())
-        elif "games" in data:
-            items = list(data["games"].values()) if isinstance(data["games"], dict) else data["games"]
-        else:
-            items = [v for v in data.values() if isinstance(v, dict)]
-    elif isinstance(data, list):
-        items = data
-    else:
-        items = []
-    for g in items:
-        if isinstance(g, dict) and (g.get("title") or "").strip() == slug:
-            return g
-    return None
+    return manifest_cache.get_by_slug(slug)
 
 login_children = {}
 
@@ -693,7 +1505,7 @@ login_children = {}
 def index():
     status = {
         "cookies": os.path.exists(COOKIES),
-        "manifest": os.path.exists(MANIFEST),
+        "manifest": os.path.exists(MANIFEST) or os.path.exists(LEGACY_MANIFEST),
         "need_2fa": session.pop("need_2fa", False),
         "login_token": session.get("login_token"),
     }
@@ -776,32 +1588,76 @@ def run_update():
         args.append("-skipknown")
     if request.form.get("updateonly"):
         args.append("-updateonly")
-    job_id = start_job(args, cwd=DATA_DIR)
+    job_id = start_job(args, cwd=DATA_DIR, locks=[("manifest", "w")])
     return jsonify({"job_id": job_id})
 
 @app.route("/job_status/<job_id>")
 def job_status(job_id):
-    job = jobs.get(job_id)
+    since = request.args.get("since", 0, type=int)
+    snap = job_store.snapshot(job_id, since)
+    if not snap:
+        return jsonify({"status": "unknown", "output": "", "offset": 0, "skipped": False, "rc": None, "progress": None})
+    return jsonify(snap)
+
+@app.route("/job_stream/<job_id>")
+def job_stream(job_id):
+    since = request.args.get("since", 0, type=int)
+    job = job_store.get(job_id)
     if not job:
-        return jsonify({"status": "unknown", "output": "", "rc": None})
-    with job.lock:
-        return jsonify({"status": job.status, "output": job.output, "rc": job.rc})
+        # archived jobs are done, send what is left in a single event
+        snap = job_store.snapshot(job_id, since)
+        if not snap:
+            return jsonify({"error": "unknown job"}), 404
+        return Response([f"event: update\ndata: {json.dumps(snap)}\n\n"], mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache"})
+    release = job.subscribe()
+    if release is None:
+        return jsonify({"error": "too many subscribers"}), 503
+    resp = Response(job.stream(since, release), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    resp.call_on_close(release)  # also when the client goes away before the stream starts
+    return resp
 
 @app.route("/current_job")
 def current_job():
     with _current_job_lock:
         jid = _current_job_id
     if not jid:
-        for k, j in jobs.items():
-            with j.lock:
-                if j.status == "running":
-                    jid = k
-                    break
-    if not jid or jid not in jobs:
-        return jsonify({"job_id": None, "status": "idle", "output": "", "rc": None})
-    j = jobs[jid]
-    with j.lock:
-        return jsonify({"job_id": jid, "status": j.status, "output": j.output, "rc": j.rc})
+        pending = job_store.running() or job_store.pending()
+        jid = pending[0].id if pending else None
+    job = job_store.get(jid) if jid else None
+    if not job:
+        return jsonify({"job_id": None, "status": "idle", "output": "", "offset": 0, "skipped": False, "rc": None, "progress": None})
+    return jsonify({"job_id": jid, **job.snapshot()})
+
+@app.route("/queue")
+def queue_state():
+    return jsonify(scheduler.state())
+
+@app.route("/queue/<job_id>/move", methods=["POST"])
+def queue_move(job_id):
+    position = request.form.get("position", type=int)
+    if position is None:
+        return jsonify({"error": "position is required"}), 400
+    if not scheduler.move(job_id, position):
+        return jsonify({"error": "job is not queued"}), 404
+    return jsonify(scheduler.state())
+
+@app.route("/jobs")
+def jobs_history():
+    limit = max(1, min(request.args.get("limit", 50, type=int), JOB_HISTORY_MAX_COUNT))
+    return jsonify({"jobs": job_store.list(limit)})
+
+@app.route("/jobs/<job_id>/log")
+def job_log(job_id):
+    f = job_store.open_log(job_id)
+    if f is None:
+        return jsonify({"error": "no archived log for this job"}), 404
+    def gen():
+        with f:
+            for chunk in iter(lambda: f.read(JOB_LOG_CHUNK), b""):
+                yield chunk
+    return Response(gen(), mimetype="text/plain; charset=utf-8")
 
 @app.route("/cancel_job", methods=["POST"])
 def cancel_job_endpoint():
@@ -815,16 +1671,18 @@ def cancel_job_endpoint():
 @app.route("/download_selected", methods=["POST"])
 def download_selected():
     try:
-        title = (request.form.get("selected_title") or "").strip()
-        if not title:
+        # one or more titles, as repeated selected_title fields or comma separated
+        titles = sorted({t.strip() for v in request.form.getlist("selected_title") for t in v.split(",") if t.strip()})
+        if not titles:
             return jsonify({"error": "Select a game from the list"}), 400
-        args = [PY, GOGREPO, "download", "-id", title]
+        args = [PY, GOGREPO, "download", "-id", ",".join(titles)]
         if request.form.get("skipextras"):
             args.append("-skipextras")
         if request.form.get("skipgames"):
             args.append("-skipgames")
-        job_id = start_job(args, cwd=DATA_DIR)
-        return jsonify({"job_id": job_id})
+        job_id = start_job(args, cwd=DATA_DIR, progress=True, priority=PRIORITY_INTERACTIVE,
+                           locks=[("manifest", "r"), ("downloads", "r")] + [("game:" + t, "w") for t in titles])
+        return jsonify({"job_id": job_id, "titles": titles})
     except Exception as e:
         app.logger.exception("download_selected failed")
         return jsonify({"error": str(e)}), 500
@@ -837,12 +1695,62 @@ def download_all():
             args.append("-skipextras")
         if request.form.get("skipgames"):
             args.append("-skipgames")
-        job_id = start_job(args, cwd=DATA_DIR)
+        job_id = start_job(args, cwd=DATA_DIR, progress=True, priority=PRIORITY_BULK,
+                           locks=[("manifest", "r"), ("downloads", "w")])
         return jsonify({"job_id": job_id})
     except Exception as e:
         app.logger.exception("download_all failed")
         return jsonify({"error": str(e)}), 500
 
+_BW_SCHEDULE_ENTRY = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})=(\d+(?:\.\d*)?)$")
+
+@app.route("/run_verify", methods=["POST"])
+def run_verify():
+    """Checks downloaded files against the manifest, for one game or all of them. Reads
+    only local files, so it runs alongside network jobs regardless of JOB_MAX_NETWORK."""
+    try:
+        title = (request.form.get("selected_title") or "").strip()
+        args = [PY, GOGREPO, "verify"]
+        if title:
+            args += ["-id", title]
+            locks = [("manifest", "r"), ("downloads", "r"), ("game:" + title, "w")]
+        else:
+            locks = [("manifest", "r"), ("downloads", "w")]
+        if request.form.get("skipmd5"):
+            args.append("-skipmd5")
+        job_id = start_job(args, cwd=DATA_DIR, locks=locks, network=False)
+        return jsonify({"job_id": job_id, "title": title or None})
+    except Exception as e:
+        app.logger.exception("run_verify failed")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/bandwidth", methods=["GET", "POST"])
+def bandwidth():
+    if request.method == "GET":
+        try:
+            with open(BANDWIDTH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        return jsonify({"limit": data.get("limit") or 0, "schedule": data.get("schedule") or ""})
+    try:
+        limit = float(request.form.get("limit") or 0)
+    except ValueError:
+        return jsonify({"error": "limit must be a number of MB/s"}), 400
+    if limit < 0:
+        return jsonify({"error": "limit must not be negative"}), 400
+    entries = [e for e in re.split(r"[,\s]+", (request.form.get("schedule") or "").strip()) if e]
+    for e in entries:
+        m = _BW_SCHEDULE_ENTRY.match(e)
+        if not m or int(m.group(1)) > 24 or int(m.group(3)) > 24 or int(m.group(2)) > 59 or int(m.group(4)) > 59:
+            return jsonify({"error": f"bad schedule entry {e!r}, expected HH:MM-HH:MM=MBps"}), 400
+    data = {"limit": limit, "schedule": ",".join(entries)}
+    tmp = BANDWIDTH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, BANDWIDTH)
+    return jsonify(data)
+
 @app.route("/cache/cover/<path:name>")
 def serve_cover(name: str):
     return send_from_directory(COVER_DIR, name)
@@ -862,8 +1770,28 @@ def check_downloaded(title):
     return jsonify({
         "is_downloaded": is_dl,
         "folder_name": folder_name,
-        "path": os.path.join(DOWNLOAD_DIR, folder_name)
+        "path": os.path.join(DOWNLOAD_DIR, folder_name),
+        "index_mode": download_index.mode
+    })
+
+@app.route("/completeness")
+def completeness():
+    """Bytes and files present per game compared with the manifest; ?incomplete=1 lists only unfinished games"""
+    games = completeness_index.all()
+    if request.args.get("incomplete"):
+        games = [g for g in games if not g["complete"]]
+    return jsonify({
+        "games": games,
+        "bytes_present": sum(g["bytes_present"] for g in games),
+        "bytes_total": sum(g["bytes_total"] for g in games),
     })
 
+@app.route("/completeness/<title>")
+def completeness_game(title):
+    g = manifest_cache.get_by_slug(title)
+    if g is None:
+        return jsonify({"error": "Unknown game"}), 404
+    return jsonify(completeness_index.get(title, g))
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""microbenchmark of the download i/o loop: cpu time per GB of the old 4 KB read()
+loop against gogrepo.download_ioloop, which cmd_download runs, streaming from memory
+to /dev/null so only the loop overhead is measured.
+
+    python bench/ioloop.py [-gigs 1] [-blocksize 1024 4096 8192]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import gogrepo  # noqa: E402
+
+
+class MemoryStream(object):
+    """stands in for an http response, returning total bytes copied out of one chunk.
+    like a socket, read() allocates and copies, readinto() only copies.
+    """
+
+    def __init__(self, total, chunk=b'\xa5' * 8 * 1024**2):
+        self.left = total
+        self.chunk = memoryview(chunk)
+
+    def read(self, n):
+        n = min(n, self.left, len(self.chunk))
+        self.left -= n
+        return self.chunk[:n].tobytes()
+
+    def readinto(self, view):
+        n = min(len(view), self.left, len(self.chunk))
+        view[:n] = self.chunk[:n]
+        self.left -= n
+        return n
+
+
+def old_ioloop(tid, path, page, out, lock, sizes, rates):
+    """the loop before the readinto change"""
+    sz, t0 = True, time.time()
+    while sz:
+        buf = page.read(4*1024)
+        t = time.time()
+        out.write(buf)
+        sz, dt, t0 = len(buf), t - t0, t
+        with lock:
+            sizes[path] -= sz
+            rates.setdefault(path, []).append((tid, (sz, dt)))
+
+
+def cpu_per_gig(func, total):
+    t0 = time.process_time()
+    func()
+    return (time.process_time() - t0) * 1024**3 / total
+
+
+def main():
+    p = argparse.ArgumentParser(description='download loop benchmark')
+    p.add_argument('-gigs', type=float, default=1.0, help='GB streamed per run')
+    p.add_argument('-blocksize', type=int, nargs='+', default=[1024, 4096, 8192], help='readinto buffer sizes in KB')
+    args = p.parse_args()
+    total = int(args.gigs * 1024**3)
+    tid = threading.current_thread().ident
+
+    with open(os.devnull, 'wb') as out:
+        lock = threading.Lock()
+        print('%-28s %10s' % ('loop', 'cpu s/GB'))
+        cpu = cpu_per_gig(lambda: old_ioloop(tid, 'f', MemoryStream(total), out, lock, {'f': total}, {}), total)
+        print('%-28s %10.3f' % ('read(4 KB)', cpu))
+        for kb in args.blocksize:
+            buf = bytearray(kb * 1024)
+            # the loop cmd_download runs, with an unlimited RateLimiter
+            cpu = cpu_per_gig(lambda: gogrepo.download_ioloop(MemoryStream(total), out, buf, tid, 'f', lock, {},
+                                                              gogrepo.RateLimiter(0), [len(buf)]), total)
+            print('%-28s %10.3f' % ('readinto(%d KB)' % kb, cpu))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""benchmark of manifest load/save: the old pprint'ed gog-manifest.dat against the
+sqlite gog-manifest.db, on a synthetic library.
+
+    python bench/manifest.py [-games 10000] [-files 10] [-lookups 1000]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import codecs
+import pprint
+import random
+import argparse
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import gogrepo  # noqa: E402
+from gogrepo import AttrDict  # noqa: E402
+
+gogrepo.rootLogger.setLevel('WARNING')
+
+
+def synth_item(i, kind, n, os_type='windows'):
+    return AttrDict(name='setup_game%d_%s_%d.bin' % (i, kind, n), href='/downlink/game%d/%s%d' % (i, kind, n),
+                    size=random.randint(1, 8 * 1024**3), md5='%032x' % random.getrandbits(128),
+                    desc='%s %d of game %d' % (kind, n, i), version='1.%d' % n, os_type=os_type, lang='en')
+
+
+def synth_manifest(count, files):
+    random.seed(count)
+    installers = max(1, files * 2 // 5)
+    return [AttrDict(id=1000000 + i, title='game_%d' % i, long_title='Game Number %d' % i, genre='Adventure',
+                     store_url='/game/game_%d' % i, rating=random.randint(0, 50), bg_url='//images/%d.jpg' % i,
+                     release_timestamp=1300000000 + i, gog_messages=[], changelog=None, serial='',
+                     downloads=[synth_item(i, 'installer', n) for n in range(installers)],
+                     extras=[synth_item(i, 'extra', n, os_type=None) for n in range(files - installers)])
+            for i in range(count)]
+
+
+def save_legacy(items, filepath):
+    """the pre-sqlite save_manifest"""
+    with codecs.open(filepath, 'w', 'utf-8') as w:
+        print('# {} games'.format(len(items)), file=w)
+        pprint.pprint(items, width=123, stream=w)
+
+
+def timed(func, *args):
+    t0 = time.time()
+    result = func(*args)
+    return time.time() - t0, result
+
+
+def main():
+    p = argparse.ArgumentParser(description='manifest load/save benchmark')
+    p.add_argument('-games', type=int, default=10000, help='number of synthetic games')
+    p.add_argument('-files', type=int, default=10, help='installers and extras per game')
+    p.add_argument('-lookups', type=int, default=1000, help='number of single game lookups')
+    args = p.parse_args()
+
+    items = synth_manifest(args.games, args.files)
+    tmpdir = tempfile.mkdtemp(prefix='gogrepo-bench-')
+    try:
+        legacy = os.path.join(tmpdir, gogrepo.LEGACY_MANIFEST_FILENAME)
+        db = os.path.join(tmpdir, gogrepo.MANIFEST_FILENAME)
+
+        t_legacy_save, _ = timed(save_legacy, items, legacy)
+        t_legacy_load, loaded = timed(gogrepo.load_legacy_manifest, legacy)
+        assert len(loaded) == len(items)
+        t_save, _ = timed(gogrepo.save_manifest, items, db)
+        t_load, loaded = timed(gogrepo.load_manifest, db)
+        assert loaded == items
+
+        keys = [random.choice(items).title for _ in range(args.lookups)]
+        t_lookup, _ = timed(lambda: [gogrepo.load_manifest_item(k, db) for k in keys])
+
+        print('%d games of %d files, legacy %.1f MB, sqlite %.1f MB'
+              % (args.games, args.files, os.path.getsize(legacy) / 1024.0**2, os.path.getsize(db) / 1024.0**2))
+        print('%-24s %8s %8s' % ('', 'legacy', 'sqlite'))
+        print('%-24s %7.2fs %7.2fs' % ('save', t_legacy_save, t_save))
+        print('%-24s %7.2fs %7.2fs' % ('load', t_legacy_load, t_load))
+        print('%-24s %8s %6.2fms' % ('single game lookup', '-', t_lookup * 1000.0 / args.lookups))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
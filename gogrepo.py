@@ -17,7 +17,6 @@ import logging
 import contextlib
 import json
 import html5lib
-import pprint
 import time
 import zipfile
 import hashlib
@@ -28,26 +27,31 @@ import io
 import datetime
 import shutil
 import socket
+import re
+import stat
+import sqlite3
 import xml.etree.ElementTree
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 # python 2 / 3 imports
 try:
     # python 2
-    from Queue import Queue
+    from Queue import Queue, Empty
     import cookielib as cookiejar
-    from httplib import BadStatusLine
+    from httplib import BadStatusLine, HTTPConnection, HTTPSConnection, HTTPResponse, HTTPException
     from urlparse import urlparse
     from urllib import urlencode, unquote
-    from urllib2 import HTTPError, URLError, HTTPCookieProcessor, build_opener, Request
+    from urllib2 import HTTPError, URLError, HTTPCookieProcessor, HTTPHandler, HTTPSHandler, build_opener, Request
     from itertools import izip_longest as zip_longest
     from StringIO import StringIO
 except ImportError:
     # python 3
-    from queue import Queue
+    from queue import Queue, Empty
     import http.cookiejar as cookiejar
-    from http.client import BadStatusLine
+    from http.client import BadStatusLine, HTTPConnection, HTTPSConnection, HTTPResponse, HTTPException
     from urllib.parse import urlparse, urlencode, unquote
-    from urllib.request import HTTPCookieProcessor, HTTPError, URLError, build_opener, Request
+    from urllib.request import HTTPCookieProcessor, HTTPHandler, HTTPSHandler, HTTPError, URLError, build_opener, Request
     from itertools import zip_longest
     from io import StringIO
 
@@ -60,6 +64,10 @@ try:
     from html2text import html2text
 except ImportError:
     def html2text(x): return x
+try:
+    import fcntl  # reflink copies, unix only
+except ImportError:
+    fcntl = None
 
 # lib mods
 cookiejar.MozillaCookieJar.magic_re = r'.*'  # bypass the hardcoded "Netscape HTTP Cookie File" check
@@ -82,14 +90,16 @@ log_exception = rootLogger.exception
 # filepath constants
 GAME_STORAGE_DIR = r'.'
 COOKIES_FILENAME = r'gog-cookies.dat'
-MANIFEST_FILENAME = r'gog-manifest.dat'
+MANIFEST_FILENAME = r'gog-manifest.db'
+LEGACY_MANIFEST_FILENAME = r'gog-manifest.dat'
+VERIFY_DB_FILENAME = r'gog-verify.db'
+BACKUP_CHECKPOINT_FILENAME = r'gog-backup.checkpoint'  # kept in the backup destination dir
+BANDWIDTH_FILENAME = r'gog-bandwidth.json'
+BANDWIDTH_PEERS_DIRNAME = r'gog-bandwidth.d'  # heartbeat file per rate limited download process
 SERIAL_FILENAME = r'!serial.txt'
 INFO_FILENAME = r'!info.txt'
 
 # global web utilities
-global_cookies = cookiejar.LWPCookieJar(COOKIES_FILENAME)
-cookieproc = HTTPCookieProcessor(global_cookies)
-opener = build_opener(cookieproc)
 treebuilder = html5lib.treebuilders.getTreeBuilder('etree')
 parser = html5lib.HTMLParser(tree=treebuilder, namespaceHTMLElements=False)
 
@@ -103,11 +113,20 @@ GOG_MEDIA_TYPE_GAME  = '1'
 GOG_MEDIA_TYPE_MOVIE = '2'
 
 # HTTP request settings
-HTTP_FETCH_DELAY = 1   # in seconds
+HTTP_FETCH_RPS = 2.0   # requests per second, shared by all threads (0 = unlimited)
+HTTP_FETCH_BURST = 1
 HTTP_RETRY_DELAY = 5   # in seconds
 HTTP_RETRY_COUNT = 3
 HTTP_GAME_DOWNLOADER_THREADS = 4
+HTTP_DOWNLOAD_SEGMENT_SIZE = 256*1024**2  # files larger than this are fetched as parallel byte-range segments
+HTTP_DOWNLOAD_BLOCK_SIZE = 1024**2  # read buffer of each downloader thread
+HTTP_DOWNLOAD_MIN_READ = 16*1024  # smallest read while a bandwidth limit is in effect
+HTTP_BWLIMIT_PEER_TTL = 5  # seconds a download process counts towards the shared limit after its last heartbeat
+HTTP_GAME_DETAILS_THREADS = 4
+HTTP_FILE_PROBE_THREADS = 8
 HTTP_PERM_ERRORCODES = (404, 403, 503)
+HTTP_POOL_MAXIDLE = 8          # idle keep-alive connections kept per host
+HTTP_POOL_DRAIN_SIZE = 64*1024  # unread response bodies up to this size are drained so the connection can be reused
 
 # Save manifest data for these os and lang combinations
 DEFAULT_OS_LIST = ['windows']
@@ -116,6 +135,11 @@ DEFAULT_LANG_LIST = ['en']
 # These file types don't have md5 data from GOG
 SKIP_MD5_FILE_EXT = ['.txt', '.zip']
 
+# read size when hashing files, larger reads cut the per-call overhead of the hash loop
+HASH_BLOCK_SIZE = 1024**2
+IMPORT_HASH_THREADS = 4  # hashlib releases the GIL, so threads hash on several cores
+BACKUP_THREADS = 4
+
 # Language table that maps two letter language to their unicode gogapi json name
 LANG_TABLE = {'en': u'English',   # English
               'bl': u'\u0431\u044a\u043b\u0433\u0430\u0440\u0441\u043a\u0438',  # Bulgarian
@@ -148,15 +172,277 @@ LANG_TABLE = {'en': u'English',   # English
 VALID_OS_TYPES = ['windows', 'linux', 'mac']
 VALID_LANG_TYPES = list(LANG_TABLE.keys())
 
+# sidecar marker kept next to a file while it is being downloaded
+PARTIAL_MARKER_EXT = '.partial'
+
+# downloads failing their md5 check are moved here
+QUARANTINE_DIR_NAME = '!quarantine'
+
 ORPHAN_DIR_NAME = '!orphaned'
-ORPHAN_DIR_EXCLUDE_LIST = [ORPHAN_DIR_NAME, '!misc']
+ORPHAN_DIR_EXCLUDE_LIST = [ORPHAN_DIR_NAME, QUARANTINE_DIR_NAME, '!misc', BANDWIDTH_PEERS_DIRNAME]
 ORPHAN_FILE_EXCLUDE_LIST = [INFO_FILENAME, SERIAL_FILENAME]
 
-def request(url, args=None, byte_range=None, retries=HTTP_RETRY_COUNT, delay=HTTP_FETCH_DELAY):
+
+class PooledHTTPResponse(HTTPResponse):
+    """HTTPResponse that hands its connection back to the pool when closed"""
+    _release = None
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None and self.fp is not None and not self.will_close and not self.chunked \
+                and self.length is not None and self.length <= HTTP_POOL_DRAIN_SIZE:
+            try:
+                self.read()  # drain small leftovers (e.g. byte range probes) so the connection is reusable
+            except (socket.error, BadStatusLine):
+                pass
+        reusable = self.isclosed() and not self.will_close
+        HTTPResponse.close(self)
+        if release is not None:
+            release(reusable)
+
+
+class KeepAliveHandler(HTTPHandler, HTTPSHandler):
+    """urllib handler that keeps connections alive and reuses them per host instead of
+    opening a new tcp/tls connection for every request.  a connection only goes back to
+    the pool once its response has been fully read, so the handler is safe to share
+    between threads.  https through a proxy is tunneled with CONNECT like urllib does,
+    with one pool per proxy and target host.
+    """
+
+    def __init__(self, maxidle=HTTP_POOL_MAXIDLE):
+        HTTPHandler.__init__(self)
+        HTTPSHandler.__init__(self)
+        self._maxidle = maxidle
+        self._idle = {}  # (connection class, host, tunnel host) -> [idle connections]
+        self._lock = threading.Lock()
+
+    def http_open(self, req):
+        return self._pooled_open(HTTPConnection, req)
+
+    def https_open(self, req):
+        return self._pooled_open(HTTPSConnection, req)
+
+    def _new_conn(self, conn_class, host, timeout, tunnel=None, tunnel_headers=None):
+        if conn_class is HTTPSConnection:
+            conn = conn_class(host, timeout=timeout, context=getattr(self, '_context', None))
+        else:
+            conn = conn_class(host, timeout=timeout)
+        if tunnel:
+            conn.set_tunnel(tunnel, headers=tunnel_headers)
+        conn.response_class = PooledHTTPResponse
+        return conn
+
+    def _checkout(self, key, timeout, tunnel_headers=None):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_conn(key[0], key[1], timeout, key[2], tunnel_headers), False
+
+    def _checkin(self, key, conn, reusable):
+        if reusable and conn.sock is not None:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self._maxidle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _pooled_open(self, conn_class, req):
+        host = req.host
+        if not host:
+            raise URLError('no host given')
+        tunnel = getattr(req, '_tunnel_host', None)  # set by ProxyHandler for https
+        key = (conn_class, host, tunnel)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items() if k not in headers))
+        headers['Connection'] = 'keep-alive'
+        headers = dict((name.title(), val) for name, val in headers.items())
+        tunnel_headers = {}
+        if tunnel and 'Proxy-Authorization' in headers:
+            # proxy credentials go with the CONNECT request, not to the target host
+            tunnel_headers['Proxy-Authorization'] = headers.pop('Proxy-Authorization')
+
+        while True:
+            conn, reused = self._checkout(key, req.timeout, tunnel_headers)
+            try:
+                conn.request(req.get_method(), req.selector, req.data, headers)
+                resp = conn.getresponse()
+            except (socket.error, BadStatusLine) as e:
+                conn.close()
+                if reused:
+                    continue  # the server dropped the idle connection, retry on a new one
+                raise URLError(e)
+            except:
+                conn.close()
+                raise
+            break
+
+        resp._release = lambda reusable: self._checkin(key, conn, reusable)
+        resp.url = req.get_full_url()
+        resp.msg = resp.reason
+        return resp
+
+
+# global cookie jar and keep-alive opener, shared by all threads
+global_cookies = cookiejar.LWPCookieJar(COOKIES_FILENAME)
+cookieproc = HTTPCookieProcessor(global_cookies)
+opener = build_opener(cookieproc, KeepAliveHandler())
+
+
+class EventStream(object):
+    """Writes machine readable progress events as json lines to a file descriptor.
+    A stream without a file descriptor silently drops all events.
+    """
+
+    def __init__(self, fd=None):
+        self._lock = threading.Lock()
+        self._out = io.open(fd, 'w', encoding='utf-8', buffering=1) if fd is not None else None
+
+    def emit(self, event, **fields):
+        if self._out is None:
+            return
+        fields['event'] = event
+        fields['ts'] = time.time()
+        line = json.dumps(fields)
+        with self._lock:
+            try:
+                self._out.write(line + u'\n')
+            except (IOError, OSError, ValueError):
+                self._out = None  # reader went away, keep going without events
+
+
+events = EventStream()
+
+
+class RateLimiter(object):
+    """Token bucket rate limiter that can be shared between threads.  A rate of
+    0 (or None) disables limiting.
+    """
+
+    def __init__(self, rate, burst=1):
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._stamp = time.time()
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self._rate = rate
+            if burst is not None:
+                self._burst = burst
+            self._tokens = min(self._tokens, self._burst)
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def acquire(self, tokens=1):
+        """Takes tokens from the bucket, sleeping until they are available"""
+        with self._lock:
+            if not self._rate:
+                return
+            now = time.time()
+            self._tokens = min(self._burst, self._tokens + (now - self._stamp) * self._rate)
+            self._stamp = now
+            self._tokens -= tokens  # reserve now, may go negative
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+request_limiter = RateLimiter(HTTP_FETCH_RPS, HTTP_FETCH_BURST)
+
+
+def parse_bw_schedule(spec):
+    """Parses a bandwidth schedule such as '01:00-07:00=0,07:00-01:00=5' into a list of
+    (start minute, end minute, MB/s) tuples.  Entries are separated by commas or spaces,
+    a window may wrap past midnight and a limit of 0 means unlimited.  Raises ValueError.
+    """
+    windows = []
+    for entry in re.split(r'[,\s]+', (spec or '').strip()):
+        if not entry:
+            continue
+        m = re.match(r'^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})=(\d+(?:\.\d*)?)$', entry)
+        if not m:
+            raise ValueError('bad schedule entry "%s", expected HH:MM-HH:MM=MBps' % entry)
+        h1, m1, h2, m2 = (int(v) for v in m.groups()[:4])
+        if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59:
+            raise ValueError('bad time in schedule entry "%s"' % entry)
+        windows.append((h1 * 60 + m1, h2 * 60 + m2, float(m.group(5))))
+    return windows
+
+
+def scheduled_bwlimit(limit, schedule, now=None):
+    """Returns the MB/s limit in effect at local time now: the first schedule window
+    containing it, else the default limit.
+    """
+    now = now or datetime.datetime.now()
+    minute = now.hour * 60 + now.minute
+    for start, end, mbps in schedule:
+        if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+            return mbps
+    return limit
+
+
+def load_bandwidth_control(filepath=BANDWIDTH_FILENAME):
+    """Reads the runtime bandwidth settings written by the gui, as (MB/s limit, parsed
+    schedule).  Returns None if there is no such file.  Raises ValueError if it is bad.
+    """
+    try:
+        with open(filepath, 'r') as f:
+            ctl = json.load(f)
+    except (IOError, OSError):
+        return None
+    if not isinstance(ctl, dict):
+        raise ValueError('expected a json object')
+    return float(ctl.get('limit') or 0), parse_bw_schedule(ctl.get('schedule'))
+
+
+def bandwidth_peers(leave=False, dirpath=BANDWIDTH_PEERS_DIRNAME, ttl=HTTP_BWLIMIT_PEER_TTL):
+    """Refreshes this process's heartbeat in dirpath, or removes it if leave, and returns
+    how many download processes in that dir are rate limited right now (at least 1), so
+    they can split the limit between them.  Stale heartbeats are removed.
+    """
+    mine = os.path.join(dirpath, str(os.getpid()))
+    if leave:
+        try:
+            os.remove(mine)
+        except OSError:
+            pass
+        return 1
+    try:
+        if not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        with open(mine, 'a'):
+            os.utime(mine, None)
+    except (IOError, OSError) as e:
+        warn('cannot share the bandwidth limit with other downloads: %s' % e)
+        return 1
+    count, now = 0, time.time()
+    for name in os.listdir(dirpath):
+        path = os.path.join(dirpath, name)
+        try:
+            if now - os.path.getmtime(path) <= ttl:
+                count += 1
+            else:
+                os.remove(path)
+        except OSError:
+            pass  # removed by its owner or another process meanwhile
+    return max(count, 1)
+
+
+def request(url, args=None, byte_range=None, retries=HTTP_RETRY_COUNT, delay=None):
     """Performs web request to url with optional retries, delay, and byte range.
+    Unless an explicit delay is given, the request waits on the shared rate limiter.
     """
     _retry = False
-    time.sleep(delay)
+    if delay is None:
+        request_limiter.acquire()
+    elif delay > 0:
+        time.sleep(delay)
 
     try:
         if args is not None:
@@ -170,6 +456,7 @@ def request(url, args=None, byte_range=None, retries=HTTP_RETRY_COUNT, delay=HTT
         page = opener.open(req)
     except (HTTPError, URLError, socket.error, BadStatusLine) as e:
         if isinstance(e, HTTPError):
+            e.close()  # hands the pooled connection back, nobody reads error bodies
             if e.code in HTTP_PERM_ERRORCODES:  # do not retry these HTTP codes
                 warn('request failed: %s.  will not retry.', e)
                 raise
@@ -251,21 +538,225 @@ def load_cookies():
     raise SystemExit(1)
 
 
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    pos   INTEGER NOT NULL,
+    id    INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    data  TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS games_title ON games (title);
+CREATE INDEX IF NOT EXISTS games_pos ON games (pos);
+"""
+
+
+def open_manifest_db(filepath=MANIFEST_FILENAME):
+    """Opens (and creates if needed) the sqlite manifest store.  Each game is
+    stored as one json row indexed by gog id and title/slug.
+    """
+    db = sqlite3.connect(filepath, timeout=30)
+    db.executescript(MANIFEST_SCHEMA)
+    return db
+
+
+def _attrdict_hook(d):
+    return AttrDict(**d)
+
+
+def load_legacy_manifest(filepath=LEGACY_MANIFEST_FILENAME):
+    """Loads the old pprint'ed AttrDict manifest format"""
+    with codecs.open(filepath, 'r', 'utf-8') as r:
+        ad = r.read().replace('{', 'AttrDict(**{').replace('}', '})')
+    return eval(ad)
+
+
+def migrate_legacy_manifest(filepath=MANIFEST_FILENAME, legacy_filepath=LEGACY_MANIFEST_FILENAME):
+    """One-shot conversion of an old gog-manifest.dat into the sqlite store.  The
+    old file is kept around renamed with a .bak suffix.
+    """
+    if os.path.exists(filepath) or not os.path.exists(legacy_filepath):
+        return False
+    info('migrating legacy manifest {} -> {}...'.format(legacy_filepath, filepath))
+    items = load_legacy_manifest(legacy_filepath)
+    save_manifest(items, filepath)
+    os.rename(legacy_filepath, legacy_filepath + '.bak')
+    return True
+
+
 def load_manifest(filepath=MANIFEST_FILENAME):
     info('loading local manifest...')
-    try:
-        with codecs.open(MANIFEST_FILENAME, 'r', 'utf-8') as r:
-            ad = r.read().replace('{', 'AttrDict(**{').replace('}', '})')
-        return eval(ad)
-    except IOError:
+    if filepath == MANIFEST_FILENAME:
+        migrate_legacy_manifest(filepath)
+    if not os.path.exists(filepath):
         return []
+    with contextlib.closing(open_manifest_db(filepath)) as db:
+        rows = db.execute('SELECT data FROM games ORDER BY pos').fetchall()
+    return [json.loads(data, object_hook=_attrdict_hook) for (data,) in rows]
 
 
-def save_manifest(items):
+def load_manifest_item(key, filepath=MANIFEST_FILENAME):
+    """Looks up a single game by gog id or title/slug without loading the whole
+    manifest.  Returns None if not found.
+    """
+    if filepath == MANIFEST_FILENAME:
+        migrate_legacy_manifest(filepath)
+    if not os.path.exists(filepath):
+        return None
+    with contextlib.closing(open_manifest_db(filepath)) as db:
+        row = db.execute('SELECT data FROM games WHERE title = ?', (key,)).fetchone()
+        if row is None and str(key).isdigit():
+            row = db.execute('SELECT data FROM games WHERE id = ?', (int(key),)).fetchone()
+    if row is None:
+        return None
+    return json.loads(row[0], object_hook=_attrdict_hook)
+
+
+def save_manifest(items, filepath=MANIFEST_FILENAME):
     info('saving manifest...')
-    with codecs.open(MANIFEST_FILENAME, 'w', 'utf-8') as w:
-        print('# {} games'.format(len(items)), file=w)
-        pprint.pprint(items, width=123, stream=w)
+    rows, ids, titles = [], set(), set()
+    for item in items:
+        # id and title are unique keys of the store, keep the first game claiming either
+        if item.id in ids or item.title in titles:
+            warn('manifest has more than one game with id %s or title %s, not saving the later one' % (item.id, item.title))
+            continue
+        ids.add(item.id)
+        titles.add(item.title)
+        rows.append((len(rows), item.id, item.title, json.dumps(item, sort_keys=True)))
+    with contextlib.closing(open_manifest_db(filepath)) as db:
+        with db:  # single transaction
+            db.execute('DELETE FROM games')
+            db.executemany('INSERT INTO games (pos, id, title, data) VALUES (?, ?, ?, ?)', rows)
+
+
+VERIFY_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verified (
+    path     TEXT PRIMARY KEY,
+    ino      INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5      TEXT,
+    zip_ok   INTEGER
+);
+"""
+
+
+def open_verify_db(filepath=VERIFY_DB_FILENAME):
+    """Opens (and creates if needed) the sqlite database of verified files, keyed by
+    absolute path and recording the stat info of the file at verification time.
+    """
+    db = sqlite3.connect(filepath, timeout=30)
+    db.executescript(VERIFY_DB_SCHEMA)
+    return db
+
+
+def record_verified(path, md5=None, zip_ok=None, filepath=VERIFY_DB_FILENAME):
+    st = os.stat(path)
+    with contextlib.closing(open_verify_db(filepath)) as db:
+        with db:
+            db.execute('INSERT OR REPLACE INTO verified (path, ino, size, mtime_ns, md5, zip_ok) '
+                       'VALUES (?, ?, ?, ?, ?, ?)',
+                       (os.path.abspath(path), st.st_ino, st.st_size, st.st_mtime_ns, md5, zip_ok))
+
+
+def lookup_verified(path, filepath=VERIFY_DB_FILENAME):
+    """Returns the md5 recorded for path in the verify db if the file is unchanged since,
+    else None."""
+    try:
+        st = os.stat(path)
+        with contextlib.closing(open_verify_db(filepath)) as db:
+            row = db.execute('SELECT ino, size, mtime_ns, md5 FROM verified WHERE path = ?',
+                             (os.path.abspath(path),)).fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    if row is None or tuple(row[:3]) != (st.st_ino, st.st_size, st.st_mtime_ns):
+        return None
+    return row[3]
+
+
+FICLONE = 0x40049409  # linux ioctl making a file share all extents of another (btrfs, xfs, ...)
+
+
+def copy_file_data(src, dest, offset=0):
+    """Copies the contents of src to dest the cheapest way available: a reflink clone,
+    an in-kernel os.copy_file_range or os.sendfile copy, or a plain read/write loop.
+    If offset is given, dest already holds the first offset bytes of src and only the
+    rest is copied.  Returns the method used.
+    """
+    binary = getattr(os, 'O_BINARY', 0)  # windows
+    infd = os.open(src, os.O_RDONLY | binary)
+    try:
+        outfd = os.open(dest, os.O_WRONLY | os.O_CREAT | binary, 0o666)
+        try:
+            os.ftruncate(outfd, offset)
+            size = os.fstat(infd).st_size
+            if offset == 0 and fcntl is not None:
+                try:
+                    fcntl.ioctl(outfd, FICLONE, infd)
+                    return 'reflink'
+                except (IOError, OSError):
+                    pass
+            # each method continues from wherever the previous one had to give up
+            for method in ('copy_file_range', 'sendfile'):
+                if not hasattr(os, method):
+                    continue
+                os.lseek(outfd, offset, os.SEEK_SET)
+                try:
+                    while offset < size:
+                        count = min(size - offset, 1024**3)
+                        if method == 'copy_file_range':
+                            n = os.copy_file_range(infd, outfd, count, offset, offset)
+                        else:
+                            n = os.sendfile(outfd, infd, offset, count)
+                        if n == 0:
+                            break
+                        offset += n
+                except OSError:
+                    pass
+                if offset >= size:
+                    return method
+            with io.open(infd, 'rb', closefd=False) as fsrc, io.open(outfd, 'wb', closefd=False) as fdst:
+                fsrc.seek(offset)
+                fdst.seek(offset)
+                shutil.copyfileobj(fsrc, fdst, HASH_BLOCK_SIZE)
+            return 'copy'
+        finally:
+            os.close(outfd)
+    finally:
+        os.close(infd)
+
+
+def place_file(src, dest, hardlink=False):
+    """Puts a copy of src at dest, via a temp file renamed into place so dest is never
+    left half written.  With hardlink, dest is linked to src when both are on the same
+    filesystem.  Returns the method used.
+    """
+    tmp = dest + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    method = None
+    if hardlink:
+        try:
+            os.link(src, tmp)
+            method = 'hardlink'
+        except (OSError, AttributeError):
+            pass
+    if method is None:
+        method = copy_file_data(src, tmp)
+        shutil.copymode(src, tmp)
+    os.replace(tmp, dest)
+    return method
+
+
+def quarantine_file(path, savedir):
+    """Moves path into the quarantine dir of savedir, keeping its game dir name"""
+    dest_dir = os.path.join(savedir, QUARANTINE_DIR_NAME, os.path.basename(os.path.dirname(path)))
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+    dest_file = os.path.join(dest_dir, os.path.basename(path))
+    if os.path.exists(dest_file):
+        os.remove(dest_file)
+    shutil.move(path, dest_file)
+    return dest_file
 
 
 def open_notrunc(name, bufsize=4*1024):
@@ -276,14 +767,124 @@ def open_notrunc(name, bufsize=4*1024):
     return os.fdopen(fd, 'wb', bufsize)
 
 
-def hashfile(afile, blocksize=65536):
-    afile = open(afile, 'rb')
-    hasher = hashlib.md5()
-    buf = afile.read(blocksize)
-    while len(buf) > 0:
-        hasher.update(buf)
-        buf = afile.read(blocksize)
-    return hasher.hexdigest()
+def split_segments(size, segment_size):
+    """Splits 0..size-1 into (start, end) byte ranges of at most segment_size bytes"""
+    if not segment_size or size <= segment_size:
+        return [(0, size - 1)]
+    return [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+
+def download_ioloop(page, out, buf, tid, path, lock, flows, bandwidth, read_size, hasher=None):
+    """Copies the response page to out through the reusable buffer buf, read_size[0]
+    bytes at a time, paced by the RateLimiter bandwidth.  Bytes are counted in a flow
+    cell [bytes read, finished] registered in flows under (tid, path, cell id), one per
+    call as a thread may fetch several segments of a file between two progress reports.
+    Only the registration takes lock, the loop itself takes none and allocates nothing
+    per block.
+    """
+    view = memoryview(buf)
+    flow = [0, False]
+    with lock:
+        flows[(tid, path, id(flow))] = flow
+    try:
+        while True:
+            n = page.readinto(view[:read_size[0]])
+            if not n:
+                break
+            out.write(view[:n])
+            if hasher is not None:
+                hasher.update(view[:n])
+            flow[0] += n
+            bandwidth.acquire(n)
+    finally:
+        flow[1] = True
+
+
+def write_partial_marker(path, state):
+    with open(path + PARTIAL_MARKER_EXT, 'w') as f:
+        json.dump(state, f)
+
+
+def read_partial_marker(path):
+    try:
+        with open(path + PARTIAL_MARKER_EXT, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def resume_ranges(state, cur_size):
+    """Returns the byte ranges still missing from a partial download described by its
+    marker state, or None if the partial file cannot be resumed.
+    """
+    size = state['size']
+    if state.get('segsize'):
+        if cur_size != size:
+            return None  # segmented files are preallocated, anything else is not ours
+        done = set(tuple(r) for r in state.get('done', []))
+        return [r for r in split_segments(size, state['segsize']) if r not in done]
+    if 0 < cur_size < size:
+        return [(cur_size, size - 1)]  # single range files are written sequentially, fetch the tail
+    return None
+
+
+def remove_partial_marker(path):
+    try:
+        os.remove(path + PARTIAL_MARKER_EXT)
+    except OSError:
+        pass
+
+
+def update_hashers(f, hashers, length=None, blocksize=HASH_BLOCK_SIZE):
+    """Feeds the open binary file f, or only its next length bytes, into every hasher
+    in a single read pass through one reused buffer.  Returns the number of bytes read.
+    """
+    buf = bytearray(blocksize)
+    view = memoryview(buf)
+    total = 0
+    while length is None or total < length:
+        n = f.readinto(view if length is None else view[:min(blocksize, length - total)])
+        if not n:
+            break
+        for hasher in hashers:
+            hasher.update(view[:n])
+        total += n
+    return total
+
+
+def hash_file(afile, algorithms=('md5',), stats=None, blocksize=HASH_BLOCK_SIZE):
+    """Returns {algorithm: hexdigest} of afile for the given hashlib algorithm names,
+    all computed in one read pass.  If a stats dict is given, the bytes hashed and the
+    seconds taken are added to its 'bytes' and 'seconds' counts.
+    """
+    hashers = [hashlib.new(name) for name in algorithms]
+    t0 = time.time()
+    with open(afile, 'rb', buffering=0) as f:
+        nbytes = update_hashers(f, hashers, blocksize=blocksize)
+    if stats is not None:
+        stats['bytes'] = stats.get('bytes', 0) + nbytes
+        stats['seconds'] = stats.get('seconds', 0) + time.time() - t0
+    return dict(zip(algorithms, (h.hexdigest() for h in hashers)))
+
+
+def hash_prefix(afile, length, hasher, blocksize=HASH_BLOCK_SIZE):
+    """Feeds the first length bytes of afile into hasher"""
+    with open(afile, 'rb', buffering=0) as f:
+        update_hashers(f, [hasher], length, blocksize)
+    return hasher
+
+
+def hashfile(afile, blocksize=HASH_BLOCK_SIZE, stats=None):
+    """Returns the md5 hexdigest of afile"""
+    return hash_file(afile, ('md5',), stats, blocksize)['md5']
+
+
+def hash_rate(stats, seconds=None):
+    """Formats the bytes of a hash_file stats dict and their throughput over seconds,
+    by default the time spent hashing."""
+    seconds = stats.get('seconds', 0) if seconds is None else seconds
+    nbytes = stats.get('bytes', 0)
+    return '%s at %.1fMB/s' % (pretty_size(nbytes), nbytes / 1024.0**2 / seconds if seconds > 0 else 0)
 
 
 def test_zipfile(filename):
@@ -300,6 +901,60 @@ def test_zipfile(filename):
     return False
 
 
+def verify_file(task):
+    """Runs the md5 and zip checks of one file, called in the worker processes of
+    cmd_verify.  Returns (md5 hexdigest, zip ok, error message, bytes hashed), None for
+    skipped checks.
+    """
+    path, check_md5, check_zip = task
+    stats = {}
+    try:
+        md5 = hashfile(path, stats=stats) if check_md5 else None
+        zip_ok = None
+        if check_zip:
+            try:
+                zip_ok = test_zipfile(path)
+            except (IOError, OSError):
+                raise
+            except Exception:
+                zip_ok = False  # corrupt archives raise EOFError, zlib.error, NotImplementedError...
+    except (IOError, OSError) as e:
+        return None, None, str(e), stats.get('bytes', 0)
+    except Exception as e:
+        # one bad file must not end the verify run in the worker pool
+        return None, None, '%s: %s' % (type(e).__name__, e), stats.get('bytes', 0)
+    return md5, zip_ok, None, stats.get('bytes', 0)
+
+
+def run_ordered(pool, func, tasks, keys, slots, per_key):
+    """Submits func(task) for each task to pool and yields (index, result) in task
+    order.  At most slots calls run at once, and at most per_key (0 = any number) of
+    them for tasks sharing the same key, e.g. the device a file is on.
+    """
+    queues = {}  # key -> deque of task indexes, each in task order
+    for i, key in enumerate(keys):
+        queues.setdefault(key, deque()).append(i)
+    busy = dict((key, 0) for key in queues)
+    running, results, next_idx = {}, {}, 0
+    while next_idx < len(tasks):
+        while len(running) < slots:
+            ready = [k for k, q in queues.items() if q and (not per_key or busy[k] < per_key)]
+            if not ready:
+                break
+            key = min(ready, key=lambda k: queues[k][0])  # the oldest waiting task goes first
+            i = queues[key].popleft()
+            busy[key] += 1
+            running[pool.submit(func, tasks[i])] = i
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for f in done:
+            i = running.pop(f)
+            busy[keys[i]] -= 1
+            results[i] = f.result()
+        while next_idx in results:
+            yield next_idx, results.pop(next_idx)
+            next_idx += 1
+
+
 def pretty_size(n):
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
         if n < 1024 or unit == 'TB':
@@ -313,18 +968,26 @@ def pretty_size(n):
 
 
 def get_total_size(dir):
-    total = 0
-    for (root, dirnames, filenames) in os.walk(dir):
-        for f in filenames:
-            total += os.path.getsize(os.path.join(root, f))
-    return total
-
-
-def item_checkdb(search_id, gamesdb):
-    for i in range(len(gamesdb)):
-        if search_id == gamesdb[i].id:
-            return i
-    return None
+    """Returns (total size in bytes, file count) of the files below dir, from the stat
+    info os.scandir already has at hand.  Symlinks are not followed."""
+    total, count = 0, 0
+    stack = [dir]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                        count += 1
+                except OSError:
+                    continue
+    return total, count
 
 
 def handle_game_updates(olditem, newitem):
@@ -371,9 +1034,54 @@ def fetch_file_info(d, fetch_md5):
                     warn('xml parsing error occurred trying to get md5 data for {}'.format(d.name))
 
 
+def probe_file_infos(entries, executor=None):
+    """fetches name/size (and md5 for non-extras) of each download/extra entry.  probes are
+    run through executor when given; entries are updated in place so their order is kept.
+    """
+    def probe(d):
+        try:
+            fetch_file_info(d, d.os_type != 'extra')
+        except HTTPError:
+            warn("failed to fetch %s" % d.href)
+
+    if executor is None:
+        for d in entries:
+            probe(d)
+    else:
+        for future in [executor.submit(probe, d) for d in entries]:
+            future.result()
+
+
+def file_info_key(d):
+    """what identifies the content of a download/extra entry: extras have no version, so
+    the size shown in the listing stands in for it.  entries saved before a field was
+    stored have it as None and are probed again once.
+    """
+    return d.href, d.get('version'), d.get('listed_size')
+
+
+def reuse_file_infos(entries, olditem):
+    """copies name/size/md5 into entries from olditem entries with the same file_info_key,
+    as those files have not changed.  returns the entries that still need probing.
+    """
+    known = {}
+    for d in olditem.get('downloads', []) + olditem.get('extras', []):
+        if d.get('name') is not None:
+            known[file_info_key(d)] = d
+
+    pending = []
+    for d in entries:
+        old = known.get(file_info_key(d))
+        if old is None:
+            pending.append(d)
+        else:
+            d.name, d.size, d.md5 = old.name, old.size, old.md5
+    return pending
+
+
 def filter_downloads(out_list, downloads_list, lang_list, os_list):
     """filters any downloads information against matching lang and os, translates
-    them, and extends them into out_list
+    them, and extends them into out_list.  file info is not fetched, see probe_file_infos()
     """
     filtered_downloads = []
     downloads_dict = dict(downloads_list)
@@ -399,17 +1107,14 @@ def filter_downloads(out_list, downloads_list, lang_list, os_list):
                                      name=None,
                                      size=None
                                      )
-                        try:
-                            fetch_file_info(d, True)
-                        except HTTPError:
-                            warn("failed to fetch %s" % d.href)
                         filtered_downloads.append(d)
 
     out_list.extend(filtered_downloads)
 
 
 def filter_extras(out_list, extras_list):
-    """filters and translates extras information and adds them into out_list
+    """filters and translates extras information and adds them into out_list.  file info
+    is not fetched, see probe_file_infos()
     """
     filtered_extras = []
 
@@ -418,15 +1123,12 @@ def filter_extras(out_list, extras_list):
                      os_type='extra',
                      lang='',
                      version=None,
+                     listed_size=extra.get('size'),  # e.g. "12 MB", see file_info_key()
                      href=GOG_HOME_URL + extra['manualUrl'],
                      md5=None,
                      name=None,
                      size=None,
                      )
-        try:
-            fetch_file_info(d, False)
-        except HTTPError:
-            warn("failed to fetch %s" % d.href)
         filtered_extras.append(d)
 
     out_list.extend(filtered_extras)
@@ -444,6 +1146,37 @@ def filter_dlcs(item, dlc_list, lang_list, os_list):
         filter_dlcs(item, dlc_dict['dlcs'], lang_list, os_list)  # recursive
 
 
+def fetch_game_details(item, lang_list, os_list, executor=None, olditem=None):
+    """fetches the gameDetails json for item and fills in its details, downloads and extras.
+    file probes are run through executor when given.  files unchanged since olditem are
+    not probed again.
+    """
+    api_url  = GOG_ACCOUNT_URL
+    api_url += "/gameDetails/{}.json".format(item.id)
+
+    with request(api_url) as data_request:
+        reader = codecs.getreader("utf-8")
+        item_json_data = json.load(reader(data_request))
+
+    item.bg_url = item_json_data['backgroundImage']
+    item.serial = item_json_data['cdKey']
+    item.forum_url = item_json_data['forumLink']
+    item.changelog = item_json_data['changelog']
+    item.release_timestamp = item_json_data['releaseTimestamp']
+    item.gog_messages = item_json_data['messages']
+    item.downloads = []
+    item.extras = []
+
+    # parse json data for downloads/extras/dlcs
+    filter_downloads(item.downloads, item_json_data['downloads'], lang_list, os_list)
+    filter_extras(item.extras, item_json_data['extras'])
+    filter_dlcs(item, item_json_data['dlcs'], lang_list, os_list)
+    pending = item.downloads + item.extras
+    if olditem is not None:
+        pending = reuse_file_infos(pending, olditem)
+    probe_file_infos(pending, executor)
+
+
 def process_argv(argv):
     p1 = argparse.ArgumentParser(description='%s (%s)' % (__appname__, __url__), add_help=False)
     sp1 = p1.add_subparsers(help='commands', dest='cmd', title='commands')
@@ -459,24 +1192,44 @@ def process_argv(argv):
     g2.add_argument('-skipknown', action='store_true', help='skip games already known by manifest')
     g2.add_argument('-updateonly', action='store_true', help='only games marked with the update tag')
     g2.add_argument('-id', action='store', help='id/dirname of a specific game to update')
+    g1.add_argument('-workers', action='store', type=int, help='number of game details fetched in parallel',
+                    default=HTTP_GAME_DETAILS_THREADS)
+    g1.add_argument('-rps', action='store', type=float, help='max requests per second to GOG (0 = unlimited)',
+                    default=HTTP_FETCH_RPS)
+    g1.add_argument('-reprobe', action='store_true', help='re-fetch name/size/md5 of files already known by manifest')
 
     g1 = sp1.add_parser('download', help='Download all your GOG games and extra files')
     g1.add_argument('savedir', action='store', help='directory to save downloads to', nargs='?', default='.')
     g1.add_argument('-dryrun', action='store_true', help='display, but skip downloading of any files')
     g1.add_argument('-skipextras', action='store_true', help='skip downloading of any GOG extra files')
     g1.add_argument('-skipgames', action='store_true', help='skip downloading of any GOG game files')
-    g1.add_argument('-id', action='store', help='id of the game in the manifest to download')
+    g1.add_argument('-id', action='store', help='id[s] of the game[s] in the manifest to download, comma separated')
     g1.add_argument('-wait', action='store', type=float,
                     help='wait this long in hours before starting', default=0.0)  # sleep in hr
     g1.add_argument('-skipids', action='store', help='id[s] of the game[s] in the manifest to NOT download')
+    g1.add_argument('-segsize', action='store', type=int, default=HTTP_DOWNLOAD_SEGMENT_SIZE // 1024**2,
+                    help='split files larger than this many MB into segments downloaded in parallel (0 = never)')
+    g1.add_argument('-blocksize', action='store', type=int, default=HTTP_DOWNLOAD_BLOCK_SIZE // 1024,
+                    help='read buffer size of each download thread in KB')
+    g1.add_argument('-bwlimit', action='store', type=float, default=None,
+                    help='max download rate in MB/s shared by all threads and concurrent downloads (0 = unlimited)')
+    g1.add_argument('-bwschedule', action='store', default=None,
+                    help='time of day limits overriding -bwlimit, ex. "01:00-07:00=0,07:00-01:00=5"')
 
     g1 = sp1.add_parser('import', help='Import files with any matching MD5 checksums found in manifest')
     g1.add_argument('src_dir', action='store', help='source directory to import games from')
     g1.add_argument('dest_dir', action='store', help='directory to copy and name imported files to')
+    g1.add_argument('-jobs', action='store', type=int, default=IMPORT_HASH_THREADS,
+                    help='number of files hashed in parallel')
+    g1.add_argument('-hardlink', action='store_true',
+                    help='hardlink imported files instead of copying them, when on the same filesystem')
 
     g1 = sp1.add_parser('backup', help='Perform an incremental backup to specified directory')
     g1.add_argument('src_dir', action='store', help='source directory containing gog items')
     g1.add_argument('dest_dir', action='store', help='destination directory to backup files to')
+    g1.add_argument('-jobs', action='store', type=int, default=BACKUP_THREADS,
+                    help='number of files copied in parallel')
+    g1.add_argument('-verify', action='store_true', help='check the md5 of every copied file against the manifest')
 
     g1 = sp1.add_parser('verify', help='Scan your downloaded GOG files and verify their size, MD5, and zip integrity')
     g1.add_argument('gamedir', action='store', help='directory containing games to verify', nargs='?', default='.')
@@ -485,13 +1238,22 @@ def process_argv(argv):
     g1.add_argument('-skipsize', action='store_true', help='do not perform size check')
     g1.add_argument('-skipzip', action='store_true', help='do not perform zip integrity check')
     g1.add_argument('-delete', action='store_true', help='delete any files which fail integrity test')
+    g1.add_argument('-jobs', action='store', type=int, default=1,
+                    help='number of files checked in parallel by a pool of processes')
+    g1.add_argument('-perdisk', action='store', type=int, default=0,
+                    help='max files checked at once on the same disk/filesystem (0 = no limit)')
+    g1.add_argument('-full', action='store_true',
+                    help='re-check every file, even those unchanged since their last verification')
 
     g1 = sp1.add_parser('clean', help='Clean your games directory of files not known by manifest')
     g1.add_argument('cleandir', action='store', help='root directory containing gog games to be cleaned')
     g1.add_argument('-dryrun', action='store_true', help='do not move files, only display what would be cleaned')
+    g1.add_argument('-report', action='store', help='write the orphaned dirs and files with their sizes to this json file')
 
     g1 = p1.add_argument_group('other')
     g1.add_argument('-h', '--help', action='help', help='show help message and exit')
+    g1.add_argument('-progressfd', action='store', type=int, default=os.environ.get('GOGREPO_PROGRESS_FD'),
+                    help='write json progress events to this file descriptor')
     g1.add_argument('-v', '--version', action='version', help='show version number and exit',
                     version="%s (version %s)" % (__appname__, __version__))
 
@@ -509,6 +1271,39 @@ def process_argv(argv):
                 error('error: specified os "%s" is not one of the valid os types %s' % (os_type, VALID_OS_TYPES))
                 raise SystemExit(1)
 
+        if args.workers < 1:
+            error('error: -workers must be at least 1')
+            raise SystemExit(1)
+        if args.rps < 0:
+            error('error: -rps must not be negative')
+            raise SystemExit(1)
+
+    if args.cmd == 'download':
+        if args.segsize < 0:
+            error('error: -segsize must not be negative')
+            raise SystemExit(1)
+        if args.blocksize < 1:
+            error('error: -blocksize must be at least 1')
+            raise SystemExit(1)
+        if args.bwlimit is not None and args.bwlimit < 0:
+            error('error: -bwlimit must not be negative')
+            raise SystemExit(1)
+        try:
+            if args.bwschedule is not None:
+                args.bwschedule = parse_bw_schedule(args.bwschedule)
+        except ValueError as e:
+            error('error: -bwschedule: %s' % e)
+            raise SystemExit(1)
+
+    if args.cmd in ('verify', 'import', 'backup'):
+        if args.jobs < 1:
+            error('error: -jobs must be at least 1')
+            raise SystemExit(1)
+    if args.cmd == 'verify':
+        if args.perdisk < 0:
+            error('error: -perdisk must not be negative')
+            raise SystemExit(1)
+
     return args
 
 
@@ -593,13 +1388,15 @@ def cmd_login(user, passwd):
         error('login failed, verify your username/password and try again.')
 
 
-def cmd_update(os_list, lang_list, skipknown, updateonly, id):
+def cmd_update(os_list, lang_list, skipknown, updateonly, id, workers=HTTP_GAME_DETAILS_THREADS, rps=HTTP_FETCH_RPS,
+               reprobe=False):
     media_type = GOG_MEDIA_TYPE_GAME
     items = []
     known_ids = []
     i = 0
 
     load_cookies()
+    request_limiter.set_rate(rps)
 
     gamesdb = load_manifest()
 
@@ -683,98 +1480,190 @@ def cmd_update(os_list, lang_list, skipknown, updateonly, id):
     if not id and not updateonly and not skipknown:
         info('found %d games !!%s' % (items_count, '!'*int(items_count/100)))  # teehee
 
-    # fetch item details
-    i = 0
-    for item in sorted(items, key=lambda item: item.title):
-        api_url  = GOG_ACCOUNT_URL
-        api_url += "/gameDetails/{}.json".format(item.id)
+    # fetch item details with a pool of workers sharing the request rate limiter
+    gamesdb_index = dict((game.id, idx) for idx, game in enumerate(gamesdb))
+    work = Queue()
+    results = {}
+    lock = threading.Lock()
+    for i, item in enumerate(sorted(items, key=lambda item: item.title)):
+        work.put((i + 1, item))
 
-        i += 1
-        info("(%*d / %d) fetching game details for %s..." % (print_padding, i, items_count, item.title))
+    def worker():
+        while True:
+            try:
+                (i, item) = work.get_nowait()
+            except Empty:
+                return
+            info("(%*d / %d) fetching game details for %s..." % (print_padding, i, items_count, item.title))
+            try:
+                item_idx = gamesdb_index.get(item.id)
+                olditem = gamesdb[item_idx] if item_idx is not None else None
+                fetch_game_details(item, lang_list, os_list, probe_executor, None if reprobe else olditem)
+                if olditem is not None:
+                    handle_game_updates(olditem, item)
+                with lock:
+                    results[i] = item
+            except Exception:
+                log_exception('error')
 
+    # file probes of all games share one executor, separate from the details workers
+    probe_executor = ThreadPoolExecutor(max_workers=HTTP_FILE_PROBE_THREADS)
+    pool = []
+    for _ in range(min(workers, items_count)):
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+        pool.append(t)
+    try:
+        for t in pool:
+            while t.is_alive():
+                t.join(1)
+    finally:
         try:
-            with request(api_url) as data_request:
-                reader = codecs.getreader("utf-8")
-                item_json_data = json.load(reader(data_request))
-
-                item.bg_url = item_json_data['backgroundImage']
-                item.serial = item_json_data['cdKey']
-                item.forum_url = item_json_data['forumLink']
-                item.changelog = item_json_data['changelog']
-                item.release_timestamp = item_json_data['releaseTimestamp']
-                item.gog_messages = item_json_data['messages']
-                item.downloads = []
-                item.extras = []
-
-                # parse json data for downloads/extras/dlcs
-                filter_downloads(item.downloads, item_json_data['downloads'], lang_list, os_list)
-                filter_extras(item.extras, item_json_data['extras'])
-                filter_dlcs(item, item_json_data['dlcs'], lang_list, os_list)
-
-                # update gamesdb with new item
-                item_idx = item_checkdb(item.id, gamesdb)
-                if item_idx is not None:
-                    handle_game_updates(gamesdb[item_idx], item)
-                    gamesdb[item_idx] = item
-                else:
-                    gamesdb.append(item)
-
-        except Exception:
-            log_exception('error')
+            probe_executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:
+            # cancel_futures is python 3.9+, before that queued probes still run out
+            probe_executor.shutdown(wait=False)
+
+    # update gamesdb with new items, in the same order they would be fetched serially
+    for i in sorted(results):
+        item = results[i]
+        item_idx = gamesdb_index.get(item.id)
+        if item_idx is not None:
+            gamesdb[item_idx] = item
+        else:
+            gamesdb_index[item.id] = len(gamesdb)
+            gamesdb.append(item)
 
     # save the manifest to disk
     save_manifest(gamesdb)
 
 
-def cmd_import(src_dir, dest_dir):
-    """Recursively finds all files within root_dir and compares their MD5 values
-    against known md5 values from the manifest.  If a match is found, the file will be copied
-    into the game storage dir.
+def cmd_import(src_dir, dest_dir, jobs=IMPORT_HASH_THREADS, hardlink=False):
+    """Recursively finds all files within src_dir that match a known game file or extra
+    of the manifest and places them into the game storage dir.  Only files whose exact
+    size matches a manifest entry are considered: these are md5 hashed in parallel, and
+    entries without an md5 are matched by size and filename instead.  A file matching
+    entries of several games goes to the game named by its parent dir, else to all of them.
     """
     gamesdb = load_manifest()
 
-    info("collecting md5 data out of the manifest")
-    md5_info = {}  # holds tuples of (title, filename) with md5 as key
-
+    info("collecting md5 and size data out of the manifest")
+    by_size = {}  # size -> {md5: [(title, filename)]}
+    by_size_name = {}  # (size, filename) -> [(title, filename)], for files without an md5
     for game in gamesdb:
-        for game_item in game.downloads:
+        for game_item in game.downloads + game.extras:
+            if game_item.name is None or game_item.size is None:
+                continue
             if game_item.md5 is not None:
-                md5_info[game_item.md5] = (game.title, game_item.name)
+                entries = by_size.setdefault(game_item.size, {}).setdefault(game_item.md5, [])
+            else:
+                entries = by_size_name.setdefault((game_item.size, game_item.name), [])
+            if (game.title, game_item.name) not in entries:
+                entries.append((game.title, game_item.name))
 
     info("searching for files within '%s'" % src_dir)
-    file_list = []
+    candidates = []  # (path, size)
+    scanned = 0
     for (root, dirnames, filenames) in os.walk(src_dir):
         for f in filenames:
-            if os.path.splitext(f)[1].lower() not in SKIP_MD5_FILE_EXT:
-                file_list.append(os.path.join(root, f))
-
-    info("comparing md5 file hashes")
-    for f in file_list:
-        fname = os.path.basename(f)
-        info("calculating md5 for '%s'" % fname)
-        h = hashfile(f)
-        if h in md5_info:
-            title, fname = md5_info[h]
-            src_dir = os.path.join(dest_dir, title)
-            dest_file = os.path.join(src_dir, fname)
-            info('found a match! [%s] -> %s' % (h, fname))
-            if os.path.isfile(dest_file):
-                if h == hashfile(dest_file):
-                    info('destination file already exists with the same md5 value.  skipping copy.')
+            path = os.path.join(root, f)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            scanned += 1
+            if size in by_size or (size, f) in by_size_name:
+                candidates.append((path, size))
+    info("%d of %d files match the size of a known file" % (len(candidates), scanned))
+
+    def match(candidate):
+        """Returns ((md5, [(title, filename, whether dest already has the file)]) or None, hash stats)"""
+        path, size = candidate
+        stats = {}
+        h = None
+        entries = by_size_name.get((size, os.path.basename(path)))
+        if entries is None:
+            h = hashfile(path, stats=stats)
+            entries = by_size.get(size, {}).get(h)
+            if entries is None:
+                return None, stats
+        parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        entries = [e for e in entries if e[0] == parent] or entries
+        targets = []
+        for title, fname in entries:
+            dest_file = os.path.join(dest_dir, title, fname)
+            have = os.path.isfile(dest_file) and os.path.getsize(dest_file) == size
+            if have and h is not None:
+                have = h == (lookup_verified(dest_file) or hashfile(dest_file, stats=stats))
+            targets.append((title, fname, have))
+        return (h, targets), stats
+
+    info("comparing md5 file hashes with %d threads" % jobs)
+    t0 = time.time()
+    hash_stats = {}
+    methods = {}
+    imported = 0
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for (f, _), (result, stats) in zip(candidates, executor.map(match, candidates)):
+            for k, v in stats.items():
+                hash_stats[k] = hash_stats.get(k, 0) + v
+            if result is None:
+                info("no match for '%s'" % os.path.basename(f))
+                continue
+            h, targets = result
+            for title, fname, have in targets:
+                game_dir = os.path.join(dest_dir, title)
+                dest_file = os.path.join(game_dir, fname)
+                info('found a match! [%s] -> %s' % (h or 'size and name', os.path.join(title, fname)))
+                if have:
+                    info('destination file already exists with the same %s.  skipping copy.' % ('md5 value' if h else 'size'))
                     continue
-            info("copying to %s..." % dest_file)
-            if not os.path.isdir(src_dir):
-                os.makedirs(src_dir)
-            shutil.copy(f, dest_file)
-
-
-def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id):
-    sizes, rates, errors = {}, {}, {}
+                info("copying to %s..." % dest_file)
+                if not os.path.isdir(game_dir):
+                    os.makedirs(game_dir)
+                method = place_file(f, dest_file, hardlink)
+                methods[method] = methods.get(method, 0) + 1
+                imported += 1
+                if h is not None:
+                    try:
+                        record_verified(dest_file, h)
+                    except (OSError, sqlite3.Error):
+                        pass
+
+    if hash_stats:
+        info('hashed %s' % hash_rate(hash_stats, time.time() - t0))
+    info('imported %d files%s' % (imported, ' (%s)' % ', '.join('%d by %s' % (n, m) for m, n in sorted(methods.items())) if methods else ''))
+
+
+def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id, segsize=HTTP_DOWNLOAD_SEGMENT_SIZE,
+                 blocksize=HTTP_DOWNLOAD_BLOCK_SIZE, bwlimit=None, bwschedule=None):
+    sizes, errors = {}, {}
+    flows = {}  # (thread id, path, cell id) -> flow cell, see download_ioloop
+    flows_seen = {}  # flows key -> bytes already accounted for by progress()
+    segments_left = {}  # path -> number of segments not yet downloaded
+    markers = {}  # path -> partial marker state
+    md5_results = {}  # path -> True if the streamed md5 matched, False if quarantined
+    totals = {}  # path -> full file size
     work = Queue()  # build a list of work items
 
     load_cookies()
 
-    items = load_manifest()
+    if id:
+        # look the requested games up directly instead of loading the whole manifest
+        items, seen = [], set()
+        for key in id.split(','):
+            item = load_manifest_item(key.strip())
+            if item is None:
+                warn('no game with id "{}" was found.'.format(key))
+            elif item.id not in seen:
+                seen.add(item.id)
+                items.append(item)
+        if not items:
+            error('none of the game id[s] "{}" were found.'.format(id))
+            exit(1)
+    else:
+        items = load_manifest()
     work_dict = dict()
 
     # util
@@ -783,21 +1672,10 @@ def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id):
     def gigs(b):
         return '%.2fGB' % (b / float(1024**3))
 
-    if id:
-        id_found = False
-        for item in items:
-            if item.title == id:
-                items = [item]
-                id_found = True
-                break
-        if not id_found:
-            error('no game with id "{}" was found.'.format(id))
-            exit(1)
-
     if skipids:
         info("skipping games with id[s]: {%s}" % skipids)
-        ignore_list = skipids.split(",")
-        items[:] = [item for item in items if item.title not in ignore_list]
+        ignore_set = set(key.strip() for key in skipids.split(","))
+        items[:] = [item for item in items if item.title not in ignore_set and str(item.id) not in ignore_set]
 
     # Find all items to be downloaded and push into work queue
     for item in sorted(items, key=lambda g: g.title):
@@ -858,55 +1736,84 @@ def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id):
                 continue  # no game name, usually due to 404 during file fetch
             dest_file = os.path.join(item_homedir, game_item.name)
 
+            ranges = None
             if os.path.isfile(dest_file):
                 if game_item.size is None:
                     warn('     unknown    %s has no size info.  skipping')
                     continue
+                elif os.path.exists(dest_file + PARTIAL_MARKER_EXT):
+                    state = read_partial_marker(dest_file)
+                    # only resume files the marker proves are a partial download of this very item
+                    if state and state.get('size') == game_item.size and state.get('md5') == game_item.md5:
+                        ranges = resume_ranges(state, os.path.getsize(dest_file))
+                    if ranges is None:
+                        warn('     fail       %s is incomplete and cannot be resumed.' % game_item.name)
                 elif game_item.size != os.path.getsize(dest_file):
                     warn('     fail       %s has incorrect size.' % game_item.name)
                 else:
                     info('     pass       %s' % game_item.name)
                     continue  # move on to next game item
 
-            info('     download   %s' % game_item.name)
-            sizes[dest_file] = game_item.size
+            if ranges is None:
+                info('     download   %s' % game_item.name)
+                state = {'href': game_item.href, 'size': game_item.size, 'md5': game_item.md5, 'done': [],
+                         'segsize': segsize if segsize and game_item.size > segsize else 0}
+                ranges = split_segments(game_item.size, state['segsize'])
+            else:
+                info('     resume     %s' % game_item.name)
+                state['href'] = game_item.href
+            sizes[dest_file] = sum(end - start + 1 for (start, end) in ranges)
+            totals[dest_file] = game_item.size
+            markers[dest_file] = state
 
-            work_dict[dest_file] = (game_item.href, game_item.size, 0, game_item.size-1, dest_file)
+            work_dict[dest_file] = [(game_item.href, game_item.size, start, end, dest_file)
+                                    for (start, end) in ranges]
 
     for work_item in work_dict:
-        work.put(work_dict[work_item])
+        segments_left[work_item] = len(work_dict[work_item])
+        for segment in work_dict[work_item]:
+            work.put(segment)
 
     if dryrun:
         info("{} left to download".format(gigs(sum(sizes.values()))))
         return  # bail, as below just kicks off the actual downloading
 
     info('-'*60)
+    events.emit('start', files=len(sizes), total=sum(totals.values()), remaining=sum(sizes.values()))
 
-    # work item I/O loop
-    def ioloop(tid, path, page, out):
-        sz, t0 = True, time.time()
-        while sz:
-            buf = page.read(4*1024)
-            t = time.time()
-            out.write(buf)
-            sz, dt, t0 = len(buf), t - t0, t
-            with lock:
-                sizes[path] -= sz
-                rates.setdefault(path, []).append((tid, (sz, dt)))
+    def relpath(path):
+        return "%s/%s" % (os.path.basename(os.path.split(path)[0]), os.path.split(path)[1])
+
+    # must be called with lock held
+    def record_error(path, e):
+        errors.setdefault(path, []).append(e)
+        events.emit('error', file=relpath(path), message=str(e))
 
     # downloader worker thread main loop
     def worker():
         tid = threading.current_thread().ident
+        buf = bytearray(blocksize)
         while not work.empty():
             (href, sz, start, end, path) = work.get()
+            done, hasher = False, None
             try:
                 dest_dir = os.path.dirname(path)
                 with lock:
                     if not os.path.isdir(dest_dir):
                         os.makedirs(dest_dir)
-                    if os.path.exists(path) and os.path.getsize(path) > sz:  # if needed, truncate file if ours is larger than expected size
-                        with open_notrunc(path) as f:
-                            f.truncate(sz)
+                    if path not in started:
+                        # mark the file incomplete until all of its segments are done
+                        started.add(path)
+                        write_partial_marker(path, markers[path])
+                        if os.path.exists(path) and os.path.getsize(path) > sz:  # if needed, truncate file if ours is larger than expected size
+                            with open_notrunc(path) as f:
+                                f.truncate(sz)
+                        if markers[path]['segsize']:  # preallocate so segments can be written at their offsets
+                            with open_notrunc(path) as f:
+                                f.truncate(sz)
+                # files fetched as one sequential range are md5 checked as the bytes arrive
+                if not markers[path]['segsize'] and markers[path]['md5']:
+                    hasher = hash_prefix(path, start, hashlib.md5()) if start > 0 else hashlib.md5()
                 with open_notrunc(path) as out:
                     out.seek(start)
                     se = start, end
@@ -918,36 +1825,132 @@ def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id):
                                     error("chunk request has unexpected Content-Range. "
                                           "expected '%d-%d/%d' received '%s'. skipping."
                                           % (start, end, sz, hdr))
+                                    record_error(path, 'unexpected Content-Range %s' % hdr)
                             else:
                                 assert out.tell() == start
-                                ioloop(tid, path, page, out)
+                                download_ioloop(page, out, buf, tid, path, lock, flows, bandwidth, bw_read, hasher)
                                 assert out.tell() == end + 1
+                                done = True
                     except HTTPError as e:
                         error("failed to download %s, byte_range=%s" % (os.path.basename(path), str(se)))
-            except IOError as e:
+                        with lock:
+                            record_error(path, e)
+            except (IOError, HTTPException) as e:
                 with lock:
                     print('!', path, file=sys.stderr)
-                    errors.setdefault(path, []).append(e)
+                    record_error(path, e)
+            with lock:
+                segments_left[path] -= 1
+                complete = done and segments_left[path] == 0 and path not in errors
+                if done:
+                    markers[path]['done'].append([start, end])
+                    if not complete and markers[path]['segsize']:
+                        write_partial_marker(path, markers[path])  # remember finished segments for resuming
+            if complete:
+                # the file stays marked partial until its md5 is checked
+                md5 = markers[path]['md5']
+                try:
+                    actual = None
+                    if hasher is not None:
+                        actual = hasher.hexdigest()
+                    elif md5 and markers[path]['segsize']:
+                        # segments arrive out of order, so hash the assembled file
+                        info('     md5 check  %s' % relpath(path))
+                        actual = hashfile(path)
+                    if actual is None or actual == md5:
+                        with lock:
+                            remove_partial_marker(path)
+                            events.emit('file_done', file=relpath(path), total=totals[path])
+                            if actual is not None:
+                                md5_results[path] = True
+                                try:
+                                    record_verified(path, md5)
+                                except (OSError, sqlite3.Error) as e:
+                                    warn('failed to record md5 check of %s: %s' % (os.path.basename(path), e))
+                    else:
+                        dest_file = quarantine_file(path, savedir)
+                        with lock:
+                            remove_partial_marker(path)
+                            error('md5 mismatch for %s, moved to %s' % (os.path.basename(path), dest_file))
+                            md5_results[path] = False
+                            record_error(path, 'md5 mismatch, quarantined')
+                except (IOError, OSError) as e:
+                    with lock:
+                        error('failed to md5 check %s: %s' % (os.path.basename(path), e))
+                        record_error(path, e)
             work.task_done()
 
     # detailed progress report
-    def progress():
+    def progress(elapsed):
         with lock:
-            left = sum(sizes.values())
-            for path, flowrates in sorted(rates.items()):
-                flows = {}
-                for tid, (sz, t) in flowrates:
-                    szs, ts = flows.get(tid, (0, 0))
-                    flows[tid] = sz + szs, t + ts
-                bps = sum(szs/ts for szs, ts in list(flows.values()) if ts > 0)
+            path_flows = {}
+            for key, flow in list(flows.items()):
+                tid, path, _ = key
+                nbytes, finished = flow
+                delta = nbytes - flows_seen.get(key, 0)
+                flows_seen[key] = nbytes
+                if finished:
+                    del flows[key]
+                    del flows_seen[key]
+                if delta or not finished:
+                    szs, tids = path_flows.get(path, (0, set()))
+                    tids.add(tid)
+                    path_flows[path] = (szs + delta, tids)
+            file_events = []
+            total_bps = 0
+            for path, (szs, tids) in sorted(path_flows.items()):
+                sizes[path] -= szs
+                bps = szs / elapsed if elapsed > 0 else 0
+                total_bps += bps
                 info('%10s %8.1fMB/s %2dx  %s' % \
-                    (megs(sizes[path]), bps / 1024.0**2, len(flows), "%s/%s" % (os.path.basename(os.path.split(path)[0]), os.path.split(path)[1])))
-            if len(rates) != 0:  # only update if there's change
+                    (megs(sizes[path]), bps / 1024.0**2, len(tids), relpath(path)))
+                file_events.append({'file': relpath(path), 'done': totals[path] - sizes[path], 'total': totals[path],
+                                    'rate': bps, 'eta': sizes[path] / bps if bps > 0 else None, 'threads': len(tids)})
+            left = sum(sizes.values())
+            if len(path_flows) != 0:  # only update if there's change
                 info('%s remaining' % gigs(left))
-            rates.clear()
+            events.emit('progress', files=file_events, total=sum(totals.values()), remaining=left, rate=total_bps,
+                        eta=left / total_bps if total_bps > 0 else None, queue=work.qsize(),
+                        errors=sum(len(e) for e in errors.values()), bwlimit=bandwidth.rate or None)
+
+    # bandwidth limit shared by all threads, re-evaluated every second from the schedule
+    # and from the control file the gui writes, unless -bwlimit/-bwschedule were given.
+    # concurrent download processes in this dir split the limit evenly.
+    bandwidth = RateLimiter(0)
+    bw_read = [blocksize]  # read size, kept small enough for the limiter to pace smoothly
+    bw_state = {'mtime': None, 'ctl': None, 'mbps': None, 'peers': None}
+    bw_explicit = bwlimit is not None or bwschedule is not None
+
+    def apply_bwlimit():
+        try:
+            mtime = os.stat(BANDWIDTH_FILENAME).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != bw_state['mtime']:
+            bw_state['mtime'] = mtime
+            if bw_explicit:
+                if mtime is not None:
+                    warn('-bwlimit/-bwschedule given, ignoring %s' % BANDWIDTH_FILENAME)
+            else:
+                try:
+                    bw_state['ctl'] = load_bandwidth_control()
+                except ValueError as e:
+                    warn('ignoring bad %s: %s' % (BANDWIDTH_FILENAME, e))
+        limit, schedule = bw_state['ctl'] or (bwlimit or 0, bwschedule or ())
+        mbps = scheduled_bwlimit(limit, schedule)
+        peers = bandwidth_peers() if mbps else bandwidth_peers(leave=True)
+        if (mbps, peers) != (bw_state['mbps'], bw_state['peers']):
+            bw_state['mbps'], bw_state['peers'] = mbps, peers
+            rate = mbps * 1024**2 / peers
+            bandwidth.set_rate(rate, burst=max(blocksize, rate / 4))
+            bw_read[0] = min(blocksize, max(HTTP_DOWNLOAD_MIN_READ, int(rate / 16))) if rate else blocksize
+            info('bandwidth limit %s%s' % ('%.1fMB/s' % mbps if mbps else 'off',
+                                           ', %.1fMB/s each for %d downloads' % (mbps / peers, peers) if peers > 1 else ''))
 
     # process work items with a thread pool
     lock = threading.Lock()
+    started = set()
+    apply_bwlimit()
     pool = []
     for i in range(HTTP_GAME_DOWNLOADER_THREADS):
         t = threading.Thread(target=worker)
@@ -955,52 +1958,224 @@ def cmd_download(savedir, skipextras, skipgames, skipids, dryrun, id):
         t.start()
         pool.append(t)
     try:
+        t0 = time.time()
         while any(t.is_alive() for t in pool):
-            progress()
             time.sleep(1)
+            now = time.time()
+            progress(now - t0)
+            t0 = now
+            apply_bwlimit()
+        progress(time.time() - t0)  # account for the last bytes read
     except KeyboardInterrupt:
         raise
     except:
         with lock:
             log_exception('')
         raise
+    finally:
+        if bw_state['mbps']:
+            bandwidth_peers(leave=True)
+
+    events.emit('finish', total=sum(totals.values()), remaining=sum(sizes.values()),
+                errors=sum(len(e) for e in errors.values()))
+
+    if md5_results:
+        bad_md5_cnt = list(md5_results.values()).count(False)
+        info('md5 verified %d downloads, %d mismatches quarantined in %s'
+             % (len(md5_results) - bad_md5_cnt, bad_md5_cnt, os.path.join(savedir, QUARANTINE_DIR_NAME)))
+
+
+def load_backup_checkpoint(filepath):
+    """Reads a backup checkpoint, a json line per event, into {relative path: last record}"""
+    records = {}
+    try:
+        with open(filepath, 'r') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    records[rec['path']] = rec
+                except (ValueError, KeyError, TypeError):
+                    continue  # a line cut short by an interrupted run
+    except (IOError, OSError):
+        pass
+    return records
 
 
-def cmd_backup(src_dir, dest_dir):
+def cmd_backup(src_dir, dest_dir, jobs=BACKUP_THREADS, verify=False):
+    """Incrementally copies the files known by the manifest from src_dir to dest_dir with
+    a pool of copy threads.  A file is copied if it is missing from dest_dir or has
+    another size there, or if its source changed since the copy recorded in the
+    checkpoint file.  Copies are written to a temp file first, and a copy cut short by
+    an interrupted run is resumed from where it stopped.  A destination file of the right
+    size without a checkpoint record is kept as 'assumed', or md5 checked with verify.
+    """
     gamesdb = load_manifest()
 
-    info('finding all known files in the manifest')
-    for game in sorted(gamesdb, key=lambda g: g.title):
-        touched = False
-        for itm in game.downloads + game.extras:
-            if itm.name is None:
-                continue
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+    checkpoint_path = os.path.join(dest_dir, BACKUP_CHECKPOINT_FILENAME)
+    checkpoint = load_backup_checkpoint(checkpoint_path)
+    lock = threading.Lock()
 
-            src_game_dir = os.path.join(src_dir, game.title)
-            src_file = os.path.join(src_game_dir, itm.name)
-            dest_game_dir = os.path.join(dest_dir, game.title)
-            dest_file = os.path.join(dest_game_dir, itm.name)
+    def record(rel, state, st, md5=None):
+        rec = {'path': rel, 'state': state, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'md5': md5}
+        with lock:
+            checkpoint[rel] = rec
+            checkpoint_file.write(json.dumps(rec) + '\n')
+            checkpoint_file.flush()
+
+    hash_stats = {}
+    methods = {}
+    failed = set()
+    touched = set()
+
+    def hash_copy(path):
+        stats = {}
+        md5 = hashfile(path, stats=stats)
+        with lock:
+            for k, v in stats.items():
+                hash_stats[k] = hash_stats.get(k, 0) + v
+        return md5
+
+    def check_existing(task):
+        """md5 checks a destination file copied before checkpoints were kept.  Returns the
+        task if it needs copying."""
+        game, itm, rel, src_file, dest_file, st, offset = task
+        try:
+            info('verifying existing %s...' % dest_file)
+            if hash_copy(dest_file) == itm.md5:
+                record(rel, 'done', st, itm.md5)
+                return None
+        except (IOError, OSError) as e:
+            warn('could not read existing %s: %s' % (dest_file, e))
+        else:
+            warn('existing copy of %s does not match its md5, copying it again' % rel)
+        return task
 
-            if os.path.isfile(src_file):
-                if itm.size != os.path.getsize(src_file):
-                    warn('source file %s has unexpected size. skipping.' % src_file)
-                    continue
+    def backup_file(task):
+        game, itm, rel, src_file, dest_file, st, offset = task
+        tmp_file = dest_file + '.tmp'
+        try:
+            dest_game_dir = os.path.dirname(dest_file)
+            with lock:
                 if not os.path.isdir(dest_game_dir):
                     os.makedirs(dest_game_dir)
-                if not os.path.exists(dest_file) or itm.size != os.path.getsize(dest_file):
-                    info('copying to %s...' % dest_file)
-                    shutil.copy(src_file, dest_file)
-                    touched = True
+            if offset:
+                info('resuming copy to %s at %s...' % (dest_file, pretty_size(offset)))
+            else:
+                info('copying to %s...' % dest_file)
+            record(rel, 'started', st)
+            method = copy_file_data(src_file, tmp_file, offset)
+            shutil.copymode(src_file, tmp_file)
+            md5 = None
+            if verify and itm.md5 is not None:
+                md5 = hash_copy(tmp_file)
+                if md5 != itm.md5:
+                    os.remove(tmp_file)
+                    record(rel, 'failed', st)
+                    error('md5 mismatch for copy of %s, removed' % rel)
+                    with lock:
+                        failed.add(rel)
+                    return None
+            os.replace(tmp_file, dest_file)
+            record(rel, 'done', st, md5)
+            with lock:
+                methods[method] = methods.get(method, 0) + 1
+            return game
+        except (IOError, OSError) as e:
+            error('failed to copy %s: %s' % (rel, e))
+            with lock:
+                failed.add(rel)
+            return None
 
-        # backup the info and serial files too
-        if touched and os.path.isdir(dest_game_dir):
-            for extra_file in [INFO_FILENAME, SERIAL_FILENAME]:
-                if os.path.exists(os.path.join(src_game_dir, extra_file)):
-                    shutil.copy(os.path.join(src_game_dir, extra_file), dest_game_dir)
+    t0 = time.time()
+    work = []  # (game, item, relative path, src file, dest file, src stat, resume offset)
+    try:
+        with open(checkpoint_path, 'a') as checkpoint_file:
+            info('finding all known files in the manifest')
+            existing = []  # tasks of destination files to md5 check before deciding to copy them
+            for game in sorted(gamesdb, key=lambda g: g.title):
+                for itm in game.downloads + game.extras:
+                    if itm.name is None:
+                        continue
+
+                    src_file = os.path.join(src_dir, game.title, itm.name)
+                    dest_file = os.path.join(dest_dir, game.title, itm.name)
+                    rel = game.title + '/' + itm.name
+                    try:
+                        st = os.stat(src_file)
+                    except OSError:
+                        continue
+                    if not stat.S_ISREG(st.st_mode):
+                        continue
+                    if itm.size != st.st_size:
+                        warn('source file %s has unexpected size. skipping.' % src_file)
+                        continue
+
+                    rec = checkpoint.get(rel)
+                    same_src = rec is not None and (rec.get('size'), rec.get('mtime_ns')) == (st.st_size, st.st_mtime_ns)
+                    task = (game, itm, rel, src_file, dest_file, st, 0)
+                    if os.path.isfile(dest_file) and os.path.getsize(dest_file) == itm.size:
+                        if rec is None or (same_src and rec.get('state') == 'assumed'):
+                            # copied before checkpoints were kept, only the size is known to match
+                            if verify and itm.md5 is not None:
+                                existing.append(task)
+                            elif rec is None:
+                                record(rel, 'assumed', st)
+                            continue
+                        if same_src and rec.get('state') == 'done':
+                            continue
+                    tmp_file = dest_file + '.tmp'
+                    if same_src and rec.get('state') == 'started' and os.path.isfile(tmp_file):
+                        task = task[:6] + (min(os.path.getsize(tmp_file), st.st_size),)
+                    work.append(task)
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                if existing:
+                    info('md5 checking %d existing files without a checkpoint record' % len(existing))
+                    work.extend(t for t in executor.map(check_existing, existing) if t is not None)
+                info('copying %d files (%s) with %d threads' % (len(work), pretty_size(sum(t[5].st_size - t[6] for t in work)), jobs))
+                for game in executor.map(backup_file, work):
+                    if game is not None:
+                        touched.add(game.title)
+    finally:
+        # compact the checkpoint to the last record of each file
+        with lock:
+            tmp_path = checkpoint_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for rec in checkpoint.values():
+                    f.write(json.dumps(rec) + '\n')
+            os.replace(tmp_path, checkpoint_path)
+
+    # backup the info and serial files too
+    for title in sorted(touched):
+        src_game_dir = os.path.join(src_dir, title)
+        dest_game_dir = os.path.join(dest_dir, title)
+        for extra_file in [INFO_FILENAME, SERIAL_FILENAME]:
+            if os.path.exists(os.path.join(src_game_dir, extra_file)):
+                shutil.copy(os.path.join(src_game_dir, extra_file), dest_game_dir)
+
+    copied = sum(methods.values())
+    if copied or failed:
+        elapsed = time.time() - t0
+        nbytes = sum(t[5].st_size - t[6] for t in work if t[2] not in failed)
+        info('copied %d files, %s in %.1fs (%s)' % (copied, pretty_size(nbytes), elapsed,
+                                                    ', '.join('%d by %s' % (n, m) for m, n in sorted(methods.items()))))
+        if hash_stats:
+            info('md5 verified %s' % hash_rate(hash_stats, elapsed))
+        if failed:
+            error('%d files failed, run backup again to retry them' % len(failed))
+    else:
+        info('backup is up to date')
+        if hash_stats:
+            info('md5 verified %s' % hash_rate(hash_stats, time.time() - t0))
 
 
-def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, id):
-    """Verifies all game files match manifest with any available md5 & file size info
+def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, id, jobs=1, perdisk=0, full=False):
+    """Verifies all game files match manifest with any available md5 & file size info.
+    With jobs > 1 the md5 and zip checks run in a process pool, results are still
+    reported in manifest order.  Md5 and zip results are cached in the verify db and
+    reused while a file's inode, size and mtime are unchanged, unless full is set.
     """
     item_count = 0
     missing_cnt = 0
@@ -1008,6 +2183,8 @@ def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, i
     bad_size_cnt = 0
     bad_zip_cnt = 0
     del_file_cnt = 0
+    cached_cnt = 0
+    hash_stats = {'bytes': 0}
 
     items = load_manifest()
 
@@ -1025,6 +2202,14 @@ def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, i
         info('verifying all known files in the manifest')
         games_to_check = sorted(items, key=lambda g: g.title)
 
+    db = open_verify_db()
+    cache = {}  # abspath -> (ino, size, mtime_ns, md5, zip_ok)
+    if not full:
+        for row in db.execute('SELECT path, ino, size, mtime_ns, md5, zip_ok FROM verified'):
+            cache[row[0]] = row[1:]
+
+    # collect the files to check, the expensive checks are done by verify_file
+    checks = []  # (dirpath, file, item, stat or None if missing, cached md5, cached zip result, task)
     for game in games_to_check:
         for itm in game.downloads + game.extras:
             if itm.name is None:
@@ -1035,32 +2220,87 @@ def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, i
 
             itm_dirpath = os.path.join(game.title, itm.name)
             itm_file = os.path.join(gamedir, game.title, itm.name)
+            try:
+                st = os.stat(itm_file)
+                if not stat.S_ISREG(st.st_mode):
+                    st = None
+            except OSError:
+                st = None
+            if st is None:
+                checks.append((itm_dirpath, itm_file, itm, None, None, None, None))
+                continue
 
-            if os.path.isfile(itm_file):
-                info('verifying %s...' % itm_dirpath)
+            md5, zip_ok = None, None
+            row = cache.get(os.path.abspath(itm_file))
+            if row is not None and tuple(row[:3]) == (st.st_ino, st.st_size, st.st_mtime_ns):
+                md5, zip_ok = row[3], None if row[4] is None else bool(row[4])
+            need_md5 = check_md5 and itm.md5 is not None and md5 is None
+            need_zip = check_zips and itm.name.lower().endswith('.zip') and zip_ok is None
+            task = (itm_file, need_md5, need_zip) if need_md5 or need_zip else None
+            checks.append((itm_dirpath, itm_file, itm, st, md5, zip_ok, task))
+
+    tasks = [c[6] for c in checks if c[6] is not None]
+    devs = [c[3].st_dev for c in checks if c[6] is not None]
+    if jobs > 1 and len(tasks) > 1:
+        info('checking files with %d processes%s' % (jobs, ', %d per disk' % perdisk if perdisk else ''))
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = (r for _, r in run_ordered(pool, verify_file, tasks, devs, jobs, perdisk))
+    else:
+        pool = None
+        results = (verify_file(t) for t in tasks)
 
-                fail = False
-                if check_md5 and itm.md5 is not None:
-                    if itm.md5 != hashfile(itm_file):
-                        info('mismatched md5 for %s' % itm_dirpath)
-                        bad_md5_cnt += 1
-                        fail = True
-                if check_filesize and itm.size is not None:
-                    if itm.size != os.path.getsize(itm_file):
-                        info('mismatched file size for %s' % itm_dirpath)
-                        bad_size_cnt += 1
-                        fail = True
-                if check_zips and itm.name.lower().endswith('.zip'):
-                    if not test_zipfile(itm_file):
-                        info('zip test failed for %s' % itm_dirpath)
-                        bad_zip_cnt += 1
-                if delete_on_fail and fail:
-                    info('deleting %s' % itm_dirpath)
-                    os.remove(itm_file)
-                    del_file_cnt += 1
-            else:
+    t0 = time.time()
+    try:
+        last_commit = time.time()
+        for itm_dirpath, itm_file, itm, st, md5, zip_ok, task in checks:
+            if st is None:
                 info('missing file %s' % itm_dirpath)
                 missing_cnt += 1
+                continue
+
+            if task is None:
+                info('verifying %s... (unchanged)' % itm_dirpath)
+                cached_cnt += 1
+            else:
+                new_md5, new_zip_ok, err, hashed = next(results)
+                hash_stats['bytes'] += hashed
+                info('verifying %s...' % itm_dirpath)
+                if err is not None:
+                    warn('could not read %s: %s' % (itm_dirpath, err))
+                    continue
+                md5 = new_md5 if new_md5 is not None else md5
+                zip_ok = new_zip_ok if new_zip_ok is not None else zip_ok
+                # keyed on the stat taken before the checks, a file changed meanwhile is checked again next time
+                db.execute('INSERT OR REPLACE INTO verified (path, ino, size, mtime_ns, md5, zip_ok) '
+                           'VALUES (?, ?, ?, ?, ?, ?)',
+                           (os.path.abspath(itm_file), st.st_ino, st.st_size, st.st_mtime_ns, md5, zip_ok))
+                if time.time() - last_commit > 5:
+                    db.commit()
+                    last_commit = time.time()
+
+            fail = False
+            if check_md5 and itm.md5 is not None and md5 != itm.md5:
+                info('mismatched md5 for %s' % itm_dirpath)
+                bad_md5_cnt += 1
+                fail = True
+            if check_filesize and itm.size is not None:
+                if itm.size != st.st_size:
+                    info('mismatched file size for %s' % itm_dirpath)
+                    bad_size_cnt += 1
+                    fail = True
+            if check_zips and zip_ok is False:
+                info('zip test failed for %s' % itm_dirpath)
+                bad_zip_cnt += 1
+            if delete_on_fail and fail:
+                info('deleting %s' % itm_dirpath)
+                os.remove(itm_file)
+                db.execute('DELETE FROM verified WHERE path = ?', (os.path.abspath(itm_file),))
+                del_file_cnt += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        db.commit()
+        db.close()
 
     info('')
     info('--totals------------')
@@ -1075,17 +2315,30 @@ def cmd_verify(gamedir, check_md5, check_filesize, check_zips, delete_on_fail, i
         info('zipfile failures.... %d' % bad_zip_cnt)
     if delete_on_fail:
         info('deleted items....... %d' % del_file_cnt)
+    if cached_cnt:
+        info('unchanged, cached... %d  (use -full to re-check)' % cached_cnt)
+    if hash_stats['bytes']:
+        info('md5 hashed.......... %s' % hash_rate(hash_stats, time.time() - t0))
 
 
-def cmd_clean(cleandir, dryrun):
+def cmd_clean(cleandir, dryrun, report=None):
+    """Moves dirs and files of cleandir not known by the manifest into the orphan dir.
+    Game dirs are checked in one os.scandir pass against a set of expected names per
+    title.  If report is given, the orphans and their sizes are written to it as json.
+    """
     items = load_manifest()
-    items_by_title = {}
     total_size = 0  # in bytes
-    have_cleaned = False
+    orphaned_dirs, orphaned_files = [], []
 
-    # make convenient dict with title/dirname as key
+    # expected file names by title/dirname, files being downloaded keep a marker next to them
+    expected = {}
     for item in items:
-        items_by_title[item.title] = item
+        names = set(ORPHAN_FILE_EXCLUDE_LIST)
+        for game_item in item.downloads + item.extras:
+            if game_item.name is not None:
+                names.add(game_item.name)
+                names.add(game_item.name + PARTIAL_MARKER_EXT)
+        expected[item.title] = names
 
     # create orphan root dir
     orphan_root_dir = os.path.join(cleandir, ORPHAN_DIR_NAME)
@@ -1094,36 +2347,38 @@ def cmd_clean(cleandir, dryrun):
             os.makedirs(orphan_root_dir)
 
     info("scanning local directories within '{}'...".format(cleandir))
-    for cur_dir in sorted(os.listdir(cleandir)):
-        cur_fulldir = os.path.join(cleandir, cur_dir)
-        if os.path.isdir(cur_fulldir) and cur_dir not in ORPHAN_DIR_EXCLUDE_LIST:
-            if cur_dir not in items_by_title:
-                info("orphaning dir  '{}'".format(cur_dir))
-                have_cleaned = True
-                total_size += get_total_size(cur_fulldir)
-                if not dryrun:
-                    shutil.move(cur_fulldir, orphan_root_dir)
-            else:
-                # dir is valid game folder, check its files
-                expected_filenames = []
-                for game_item in items_by_title[cur_dir].downloads + items_by_title[cur_dir].extras:
-                    expected_filenames.append(game_item.name)
-                for cur_dir_file in os.listdir(cur_fulldir):
-                    if os.path.isdir(os.path.join(cleandir, cur_dir, cur_dir_file)):
-                        continue  # leave subdirs alone
-                    if cur_dir_file not in expected_filenames and cur_dir_file not in ORPHAN_FILE_EXCLUDE_LIST:
-                        info("orphaning file '{}'".format(os.path.join(cur_dir, cur_dir_file)))
-                        have_cleaned = True
-                        dest_dir = os.path.join(orphan_root_dir, cur_dir)
-                        if not os.path.isdir(dest_dir):
-                            if not dryrun:
-                                os.makedirs(dest_dir)
-                        file_to_move = os.path.join(cleandir, cur_dir, cur_dir_file)
-                        total_size += os.path.getsize(file_to_move)
-                        if not dryrun:
-                            shutil.move(file_to_move, dest_dir)
-
-    if have_cleaned:
+    with os.scandir(cleandir) as it:
+        game_dirs = sorted((e for e in it if e.is_dir() and e.name not in ORPHAN_DIR_EXCLUDE_LIST),
+                           key=lambda e: e.name)
+    for cur_dir in game_dirs:
+        expected_filenames = expected.get(cur_dir.name)
+        if expected_filenames is None:
+            info("orphaning dir  '{}'".format(cur_dir.name))
+            size, count = get_total_size(cur_dir.path)
+            total_size += size
+            orphaned_dirs.append({'path': cur_dir.name, 'size': size, 'files': count})
+            if not dryrun:
+                shutil.move(cur_dir.path, orphan_root_dir)
+            continue
+
+        # dir is valid game folder, check its files
+        with os.scandir(cur_dir.path) as it:
+            orphans = sorted((e for e in it if e.name not in expected_filenames and not e.is_dir()),
+                             key=lambda e: e.name)  # leave subdirs alone
+        if orphans and not dryrun:
+            dest_dir = os.path.join(orphan_root_dir, cur_dir.name)
+            if not os.path.isdir(dest_dir):
+                os.makedirs(dest_dir)
+        for entry in orphans:
+            relpath = os.path.join(cur_dir.name, entry.name)
+            info("orphaning file '{}'".format(relpath))
+            size = entry.stat(follow_symlinks=False).st_size
+            total_size += size
+            orphaned_files.append({'path': relpath, 'size': size})
+            if not dryrun:
+                shutil.move(entry.path, dest_dir)
+
+    if orphaned_dirs or orphaned_files:
         info('')
         info('total size of newly orphaned files: {}'.format(pretty_size(total_size)))
         if not dryrun:
@@ -1131,31 +2386,44 @@ def cmd_clean(cleandir, dryrun):
     else:
         info('nothing to clean. nice and tidy!')
 
+    if report:
+        with open(report, 'w') as f:
+            json.dump({'cleandir': cleandir, 'dryrun': dryrun, 'orphan_dir': orphan_root_dir, 'total_size': total_size,
+                       'dirs': orphaned_dirs, 'files': orphaned_files}, f, indent=1)
+        info('orphan report written to {}'.format(report))
+
 
 def main(args):
+    global events
     stime = datetime.datetime.now()
 
+    if args.progressfd is not None:
+        events = EventStream(args.progressfd)
+
     if args.cmd == 'login':
         cmd_login(args.username, args.password)
         return  # no need to see time stats
     elif args.cmd == 'update':
-        cmd_update(args.os, args.lang, args.skipknown, args.updateonly, args.id)
+        cmd_update(args.os, args.lang, args.skipknown, args.updateonly, args.id, args.workers, args.rps,
+                   args.reprobe)
     elif args.cmd == 'download':
         if args.wait > 0.0:
             info('sleeping for %.2fhr...' % args.wait)
             time.sleep(args.wait * 60 * 60)
-        cmd_download(args.savedir, args.skipextras, args.skipgames, args.skipids, args.dryrun, args.id)
+        cmd_download(args.savedir, args.skipextras, args.skipgames, args.skipids, args.dryrun, args.id,
+                     args.segsize * 1024**2, args.blocksize * 1024, args.bwlimit, args.bwschedule)
     elif args.cmd == 'import':
-        cmd_import(args.src_dir, args.dest_dir)
+        cmd_import(args.src_dir, args.dest_dir, args.jobs, args.hardlink)
     elif args.cmd == 'verify':
         check_md5 = not args.skipmd5
         check_filesize = not args.skipsize
         check_zips = not args.skipzip
-        cmd_verify(args.gamedir, check_md5, check_filesize, check_zips, args.delete, args.id)
+        cmd_verify(args.gamedir, check_md5, check_filesize, check_zips, args.delete, args.id, args.jobs,
+                   args.perdisk, args.full)
     elif args.cmd == 'backup':
-        cmd_backup(args.src_dir, args.dest_dir)
+        cmd_backup(args.src_dir, args.dest_dir, args.jobs, args.verify)
     elif args.cmd == 'clean':
-        cmd_clean(args.cleandir, args.dryrun)
+        cmd_clean(args.cleandir, args.dryrun, args.report)
 
     etime = datetime.datetime.now()
     info('--')